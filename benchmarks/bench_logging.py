@@ -0,0 +1,85 @@
+"""
+Measures the cost of logging on the classification hot path.
+
+Runs the heuristic classifier under three logging set-ups (no sinks, the
+default configuration, and every request traced) and times a bare `trace()`
+call with tracing off and on.
+
+    python benchmarks/bench_logging.py [--iterations N]
+"""
+import argparse
+import asyncio
+import tempfile
+import time
+
+import numpy as np
+from loguru import logger
+
+from audio_api import config, log_config
+from audio_api.audio_classifier import classify_audio
+from audio_api.log_config import request_context, setup_logging, trace
+
+SAMPLE_RATE = 16000
+
+
+def _configure(mode: str, log_dir: str):
+    if mode == "no sinks":
+        logger.remove()
+        log_config._trace_all = False
+        return
+    config.LOG_DIR = log_dir
+    config.LOG_TRACE_SAMPLE_RATE = 1.0 if mode == "traced" else 0.0
+    setup_logging()
+
+
+async def _time_classifier(y: np.ndarray, iterations: int, sampled: bool) -> float:
+    started = time.perf_counter()
+    for _ in range(iterations):
+        with request_context(sampled=sampled):
+            await classify_audio(y, SAMPLE_RATE)
+    return (time.perf_counter() - started) / iterations
+
+
+def _time_trace_call(iterations: int, sampled: bool) -> float:
+    with request_context(sampled=sampled):
+        started = time.perf_counter()
+        for _ in range(iterations):
+            trace("Metrics: Centroid={:.2f}, ZCR={:.4f}", 1234.5, 0.05)
+        return (time.perf_counter() - started) / iterations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    t = np.linspace(0.0, 1.0, SAMPLE_RATE, endpoint=False)
+    y = (0.5 * np.sin(2 * np.pi * 440.0 * t)).astype(np.float32)
+
+    # Warm up librosa's JIT-compiled kernels outside the timed runs.
+    logger.remove()
+    asyncio.run(_time_classifier(y, 3, sampled=False))
+
+    with tempfile.TemporaryDirectory() as log_dir:
+        results = {}
+        for mode in ("no sinks", "default", "traced"):
+            _configure(mode, log_dir)
+            sampled = mode == "traced"
+            results[mode] = (
+                asyncio.run(_time_classifier(y, args.iterations, sampled)),
+                _time_trace_call(args.iterations * 50, sampled),
+            )
+            logger.complete()
+        logger.remove()
+
+    baseline = results["no sinks"][0]
+    print(f"{'mode':<10} {'classify (ms)':>14} {'overhead':>9} {'trace() (ns)':>13}")
+    for mode, (classify_s, trace_s) in results.items():
+        overhead = (classify_s - baseline) / baseline
+        print(
+            f"{mode:<10} {classify_s * 1e3:>14.3f} {overhead:>9.1%} {trace_s * 1e9:>13.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
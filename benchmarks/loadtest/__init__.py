@@ -0,0 +1,9 @@
+"""
+End-to-end load harness for `/analyze-audio`.
+
+Starts a synthetic audio origin, the API backed by an in-memory Redis
+stand-in and a stub (or tiny) model, drives it with open- or closed-loop
+traffic, and writes a JSON report. Run from the repository root:
+
+    python -m benchmarks.loadtest --help
+"""
@@ -0,0 +1,332 @@
+import argparse
+import asyncio
+import itertools
+import json
+import multiprocessing
+import random
+import socket
+import sys
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+
+import httpx
+import numpy as np
+
+from benchmarks.loadtest.app_runner import serve_app
+from benchmarks.loadtest.origin import FORMATS, serve_origin
+
+PERCENTILES = (50, 95, 99)
+
+
+@dataclass
+class Workload:
+    """Picks request URLs for a target cache-hit ratio and file-size mix."""
+
+    origin_url: str
+    hit_ratio: float
+    hot_count: int
+    durations: list[float]
+    duration_weights: list[float]
+    formats: list[str]
+    latency_budget_ms: float | None = None
+    quality: str | None = None
+    rng: random.Random = field(default_factory=random.Random)
+    hot_urls: list[str] = field(init=False)
+
+    def __post_init__(self):
+        self._cold_seeds = itertools.count(1_000_000)
+        self.hot_urls = [self._url(seed) for seed in range(self.hot_count)]
+
+    def _url(self, seed: int) -> str:
+        duration = self.rng.choices(self.durations, self.duration_weights)[0]
+        fmt = self.rng.choice(self.formats)
+        return f"{self.origin_url}/audio/{seed}.{fmt}?duration={duration}"
+
+    def body(self, url: str) -> dict:
+        body = {"audio_url": url}
+        if self.latency_budget_ms:
+            body["latency_budget_ms"] = self.latency_budget_ms
+        if self.quality:
+            body["quality"] = self.quality
+        return body
+
+    def next(self) -> tuple[str, str]:
+        if self.rng.random() < self.hit_ratio:
+            return "hit", self.rng.choice(self.hot_urls)
+        return "miss", self._url(next(self._cold_seeds))
+
+
+@dataclass
+class Sample:
+    kind: str
+    latency: float
+    ok: bool
+    model_tier: str | None = None
+
+
+async def _send(client: httpx.AsyncClient, body: dict) -> tuple[bool, str | None]:
+    """Returns whether the request succeeded and which model tier answered."""
+    try:
+        response = await client.post("/analyze-audio", json=body)
+    except httpx.HTTPError:
+        return False, None
+    if response.status_code != 200:
+        return False, None
+    return True, response.json()["data"].get("model_tier")
+
+
+async def closed_loop(
+    client: httpx.AsyncClient, workload: Workload, concurrency: int, duration: float
+) -> list[Sample]:
+    """`concurrency` clients each send their next request once the last returns."""
+    samples: list[Sample] = []
+    deadline = time.perf_counter() + duration
+
+    async def _client():
+        while time.perf_counter() < deadline:
+            kind, url = workload.next()
+            started = time.perf_counter()
+            ok, tier = await _send(client, workload.body(url))
+            samples.append(Sample(kind, time.perf_counter() - started, ok, tier))
+
+    await asyncio.gather(*(_client() for _ in range(concurrency)))
+    return samples
+
+
+async def open_loop(
+    client: httpx.AsyncClient, workload: Workload, rate: float, duration: float
+) -> list[Sample]:
+    """
+    Poisson arrivals at `rate` requests/s regardless of how fast the server
+    answers. Latency is measured from the scheduled send time, so queueing
+    delay is not hidden (no coordinated omission).
+    """
+    samples: list[Sample] = []
+
+    async def _request(scheduled: float, kind: str, url: str):
+        ok, tier = await _send(client, workload.body(url))
+        samples.append(Sample(kind, time.perf_counter() - scheduled, ok, tier))
+
+    tasks = []
+    started = time.perf_counter()
+    scheduled = started
+    while scheduled < started + duration:
+        scheduled += workload.rng.expovariate(rate)
+        await asyncio.sleep(max(0.0, scheduled - time.perf_counter()))
+        kind, url = workload.next()
+        tasks.append(asyncio.create_task(_request(scheduled, kind, url)))
+
+    await asyncio.gather(*tasks)
+    return samples
+
+
+def _summarize(values: list[float], scale: float = 1000.0) -> dict:
+    if not values:
+        return {"count": 0}
+    array = np.asarray(values) * scale
+    summary = {"count": len(values), "mean": round(float(array.mean()), 3)}
+    for p in PERCENTILES:
+        summary[f"p{p}"] = round(float(np.percentile(array, p)), 3)
+    summary["max"] = round(float(array.max()), 3)
+    return summary
+
+
+def build_report(
+    args, samples: list[Sample], elapsed: float, before: dict, after: dict
+) -> dict:
+    ok = [s for s in samples if s.ok]
+    cpu_seconds = after["cpu_seconds"] - before["cpu_seconds"]
+    wall_seconds = after["monotonic"] - before["monotonic"]
+    return {
+        "config": {
+            key: value for key, value in vars(args).items() if key != "output"
+        },
+        "requests": len(samples),
+        "errors": len(samples) - len(ok),
+        "elapsed_seconds": round(elapsed, 3),
+        "throughput_rps": round(len(ok) / elapsed, 3),
+        "latency_ms": _summarize([s.latency for s in ok]),
+        "latency_ms_by_kind": {
+            kind: _summarize([s.latency for s in ok if s.kind == kind])
+            for kind in ("hit", "miss")
+        },
+        "model_tiers": dict(Counter(s.model_tier for s in ok)),
+        "stages": {
+            name: {
+                "wall_ms": _summarize(stats["wall"]),
+                "worker_cpu_ms": _summarize(stats["worker_cpu"]),
+            }
+            for name, stats in after["stages"].items()
+        },
+        "app_process": {
+            "cpu_seconds": round(cpu_seconds, 3),
+            "cpu_utilization": round(cpu_seconds / wall_seconds, 3),
+            "rss_bytes": after["rss_bytes"],
+            "peak_rss_bytes": after["peak_rss_bytes"],
+        },
+    }
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def _wait_until_up(url: str, timeout: float = 180.0):
+    deadline = time.perf_counter() + timeout
+    async with httpx.AsyncClient() as client:
+        while True:
+            try:
+                if (await client.get(url)).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            if time.perf_counter() > deadline:
+                raise TimeoutError(f"{url} did not come up within {timeout}s")
+            await asyncio.sleep(0.2)
+
+
+async def run(args) -> dict:
+    origin_port, app_port = _free_port(), _free_port()
+    origin_url = f"http://127.0.0.1:{origin_port}"
+    app_url = f"http://127.0.0.1:{app_port}"
+
+    context = multiprocessing.get_context("spawn")
+    processes = [
+        context.Process(
+            target=serve_origin,
+            args=(origin_port, args.origin_latency_ms, args.origin_bandwidth),
+            daemon=True,
+        ),
+        context.Process(
+            target=serve_app,
+            args=(app_port, args.model, args.stub_latency_ms, args.pcm_cache_bytes),
+            daemon=True,
+        ),
+    ]
+    for process in processes:
+        process.start()
+
+    try:
+        await _wait_until_up(f"{origin_url}/health")
+        await _wait_until_up(f"{app_url}/")
+
+        durations, weights = zip(*args.durations)
+        workload = Workload(
+            origin_url=origin_url,
+            hit_ratio=args.hit_ratio,
+            hot_count=args.hot_urls,
+            durations=list(durations),
+            duration_weights=list(weights),
+            formats=args.formats,
+            latency_budget_ms=args.latency_budget_ms,
+            quality=args.quality,
+            rng=random.Random(args.seed),
+        )
+
+        limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+        async with httpx.AsyncClient(
+            base_url=app_url, timeout=args.timeout, limits=limits
+        ) as client:
+            # Warm the result cache so "hit" requests really hit.
+            semaphore = asyncio.Semaphore(args.concurrency)
+
+            async def _warm(url: str):
+                async with semaphore:
+                    await _send(client, workload.body(url))
+
+            await asyncio.gather(*(_warm(url) for url in workload.hot_urls))
+            await client.post("/_loadtest/reset")
+            before = (await client.get("/_loadtest/stats")).json()
+
+            started = time.perf_counter()
+            if args.mode == "closed":
+                samples = await closed_loop(
+                    client, workload, args.concurrency, args.duration
+                )
+            else:
+                samples = await open_loop(client, workload, args.rate, args.duration)
+            elapsed = time.perf_counter() - started
+
+            after = (await client.get("/_loadtest/stats")).json()
+    finally:
+        for process in processes:
+            process.terminate()
+            process.join()
+
+    return build_report(args, samples, elapsed, before, after)
+
+
+def _parse_durations(value: str) -> list[tuple[float, float]]:
+    """Parses `5:0.7,60:0.3` into (seconds, weight) pairs; weights default to 1."""
+    pairs = []
+    for item in value.split(","):
+        seconds, _, weight = item.partition(":")
+        pairs.append((float(seconds), float(weight or 1)))
+    return pairs
+
+
+def _parse_formats(value: str) -> list[str]:
+    formats = value.split(",")
+    unknown = set(formats) - FORMATS.keys()
+    if unknown:
+        raise argparse.ArgumentTypeError(f"unknown formats: {sorted(unknown)}")
+    return formats
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.loadtest",
+        description="Load test /analyze-audio against a local origin and in-memory Redis.",
+    )
+    parser.add_argument("--mode", choices=("closed", "open"), default="closed")
+    parser.add_argument("--concurrency", type=int, default=8, help="closed-loop clients")
+    parser.add_argument("--rate", type=float, default=20.0, help="open-loop requests/s")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds of traffic")
+    parser.add_argument("--hit-ratio", type=float, default=0.8)
+    parser.add_argument("--hot-urls", type=int, default=20)
+    parser.add_argument(
+        "--durations",
+        type=_parse_durations,
+        default=_parse_durations("5"),
+        help="audio lengths in seconds with optional weights, e.g. 5:0.7,60:0.3",
+    )
+    parser.add_argument("--formats", type=_parse_formats, default=["wav"])
+    parser.add_argument("--origin-latency-ms", type=float, default=0.0)
+    parser.add_argument(
+        "--origin-bandwidth", type=float, default=0.0, help="bytes/s, 0 for unlimited"
+    )
+    parser.add_argument(
+        "--latency-budget-ms", type=float, help="latency budget sent with every request"
+    )
+    parser.add_argument(
+        "--quality", choices=("low", "medium", "high"), help="quality hint sent with every request"
+    )
+    parser.add_argument("--model", choices=("stub", "tiny"), default="stub")
+    parser.add_argument("--stub-latency-ms", type=float, default=20.0)
+    parser.add_argument(
+        "--pcm-cache-bytes", type=int, default=0, help="PCM disk cache budget, 0 disables it"
+    )
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as fp:
+            fp.write(text)
+        print(
+            f"{report['throughput_rps']} req/s, p99 {report['latency_ms'].get('p99')} ms"
+            f" -> {args.output}",
+            file=sys.stderr,
+        )
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+import importlib
+import resource
+import tempfile
+import time
+import types
+from collections import defaultdict
+from contextvars import ContextVar
+from pathlib import Path
+
+import uvicorn
+
+from audio_api import audio_processor, config, model_tiers, profiling
+from audio_api.ml_classifier import (
+    AudioClassificationModel,
+    StubClassificationModel,
+    tiny_random_model,
+)
+from benchmarks.loadtest.memory_redis import InMemoryRedis
+
+# `audio_api.main` is shadowed by the re-exported `main()` function.
+api_main = importlib.import_module("audio_api.main")
+
+_stage_cpu: ContextVar[list[float] | None] = ContextVar("stage_cpu", default=None)
+
+_stage_stats: dict[str, dict[str, list[float]]] = defaultdict(
+    lambda: {"wall": [], "worker_cpu": []}
+)
+
+
+def _timed_stage(name: str, func):
+    async def wrapper(*args, **kwargs):
+        cpu = [0.0]
+        cpu_token = _stage_cpu.set(cpu)
+        started = time.perf_counter()
+        try:
+            return await func(*args, **kwargs)
+        finally:
+            _stage_stats[name]["wall"].append(time.perf_counter() - started)
+            _stage_stats[name]["worker_cpu"].append(cpu[0])
+            _stage_cpu.reset(cpu_token)
+
+    return wrapper
+
+
+async def _measured_run_in_thread(func, /, *args, **kwargs):
+    """Adds the worker thread's CPU time to the stage that started it."""
+    cpu = _stage_cpu.get()
+
+    def _run():
+        started = time.thread_time()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            if cpu is not None:
+                cpu[0] += time.thread_time() - started
+
+    return await profiling.run_in_thread(_run)
+
+
+def _rss_bytes() -> int:
+    with open("/proc/self/statm") as fp:
+        return int(fp.read().split()[1]) * resource.getpagesize()
+
+
+def _install_stats_routes(app):
+    @app.get("/_loadtest/stats")
+    def stats():
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        return {
+            "monotonic": time.monotonic(),
+            "cpu_seconds": usage.ru_utime + usage.ru_stime,
+            "rss_bytes": _rss_bytes(),
+            "peak_rss_bytes": usage.ru_maxrss * 1024,
+            "stages": _stage_stats,
+        }
+
+    @app.post("/_loadtest/reset")
+    def reset():
+        _stage_stats.clear()
+        return {"status": "ok"}
+
+
+def serve_app(port: int, model: str, stub_latency_ms: float, pcm_cache_bytes: int):
+    """
+    Process entry point for the API under test: in-memory Redis, a stub or
+    tiny model, quiet logging, and per-stage instrumentation.
+    """
+    workdir = Path(tempfile.mkdtemp(prefix="audio_api_loadtest_"))
+    config.LOG_DIR = str(workdir / "logs")
+    config.LOG_LEVEL = config.LOG_FILE_LEVEL = "WARNING"
+    config.PCM_CACHE_DIR = str(workdir / "pcm")
+    config.PCM_CACHE_MAX_BYTES = pcm_cache_bytes
+
+    api_main.redis = types.SimpleNamespace(
+        from_url=lambda *args, **kwargs: InMemoryRedis()
+    )
+    AudioClassificationModel._instance = (
+        tiny_random_model(hidden_size=64, num_hidden_layers=2)
+        if model == "tiny"
+        else StubClassificationModel(stub_latency_ms)
+    )
+
+    for name, attr in (
+        ("download", "download_audio_file"),
+        ("extract", "extract_audio_features"),
+        ("classify", "classify_with_tier"),
+    ):
+        setattr(api_main, attr, _timed_stage(name, getattr(api_main, attr)))
+    audio_processor.run_in_thread = _measured_run_in_thread
+    model_tiers.run_in_thread = _measured_run_in_thread
+
+    _install_stats_routes(api_main.app)
+    uvicorn.run(api_main.app, host="127.0.0.1", port=port, log_level="warning")
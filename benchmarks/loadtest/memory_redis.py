@@ -0,0 +1,40 @@
+import time
+
+
+class InMemoryRedis:
+    """
+    Stand-in for `redis.asyncio.Redis` covering the calls the API makes:
+    `get`, `mget`, `set` (with `ex` and `nx`), `delete` and `close`.
+    """
+
+    def __init__(self):
+        self._data: dict[str, tuple[str, float | None]] = {}
+
+    def _live(self, key: str) -> str | None:
+        item = self._data.get(key)
+        if item is None:
+            return None
+        value, expires_at = item
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._data[key]
+            return None
+        return value
+
+    async def get(self, key: str) -> str | None:
+        return self._live(key)
+
+    async def mget(self, keys: list[str]) -> list[str | None]:
+        return [self._live(key) for key in keys]
+
+    async def set(self, key: str, value: str, ex: int | None = None, nx: bool = False):
+        if nx and self._live(key) is not None:
+            return None
+        expires_at = time.monotonic() + ex if ex else None
+        self._data[key] = (value, expires_at)
+        return True
+
+    async def delete(self, *keys: str) -> int:
+        return sum(self._data.pop(key, None) is not None for key in keys)
+
+    async def close(self):
+        self._data.clear()
@@ -0,0 +1,84 @@
+import asyncio
+import io
+from functools import lru_cache
+
+import numpy as np
+import soundfile as sf
+import uvicorn
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
+
+ORIGIN_SAMPLE_RATE = 44100
+CHUNK_SIZE = 64 * 1024
+
+FORMATS = {
+    "wav": ("WAV", "PCM_16", "audio/wav"),
+    "flac": ("FLAC", "PCM_16", "audio/flac"),
+    "ogg": ("OGG", "VORBIS", "audio/ogg"),
+    "mp3": ("MP3", "MPEG_LAYER_III", "audio/mpeg"),
+}
+
+
+@lru_cache(maxsize=256)
+def synth_audio(seed: int, duration: float, fmt: str) -> bytes:
+    """
+    Encodes a tone plus noise. Every seed yields different content, so cold
+    requests miss both the result cache and the PCM cache.
+    """
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(duration * ORIGIN_SAMPLE_RATE)) / ORIGIN_SAMPLE_RATE
+    tone = 0.3 * np.sin(2 * np.pi * rng.uniform(200, 2000) * t)
+    y = (tone + 0.05 * rng.standard_normal(t.size)).astype(np.float32)
+
+    container, subtype, _ = FORMATS[fmt]
+    buffer = io.BytesIO()
+    sf.write(buffer, y, ORIGIN_SAMPLE_RATE, format=container, subtype=subtype)
+    return buffer.getvalue()
+
+
+def build_origin_app(latency_ms: float, bandwidth: float) -> FastAPI:
+    """
+    An origin serving `/audio/<seed>.<fmt>?duration=<seconds>`. `latency_ms`
+    delays the response headers; `bandwidth` (bytes/s, 0 for unlimited)
+    throttles the body.
+    """
+    app = FastAPI()
+
+    @app.get("/health")
+    def health():
+        return {"status": "ok"}
+
+    @app.get("/audio/{name}")
+    async def audio(name: str, duration: float = 5.0):
+        seed, _, fmt = name.partition(".")
+        if fmt not in FORMATS or not seed.isdigit():
+            raise HTTPException(status_code=404)
+
+        body = await asyncio.to_thread(synth_audio, int(seed), duration, fmt)
+        if latency_ms:
+            await asyncio.sleep(latency_ms / 1000)
+
+        async def _stream():
+            for start in range(0, len(body), CHUNK_SIZE):
+                chunk = body[start : start + CHUNK_SIZE]
+                if bandwidth:
+                    await asyncio.sleep(len(chunk) / bandwidth)
+                yield chunk
+
+        return StreamingResponse(
+            _stream(),
+            media_type=FORMATS[fmt][2],
+            headers={"Content-Length": str(len(body))},
+        )
+
+    return app
+
+
+def serve_origin(port: int, latency_ms: float, bandwidth: float):
+    """Process entry point for the origin server."""
+    uvicorn.run(
+        build_origin_app(latency_ms, bandwidth),
+        host="127.0.0.1",
+        port=port,
+        log_level="warning",
+    )
@@ -1,4 +1,3 @@
-import asyncio
 from pathlib import Path
 from typing import Dict, Any, Tuple
 
@@ -6,12 +5,16 @@ import librosa
 import numpy as np
 from loguru import logger
 
+from audio_api.pcm_cache import file_digest, get_pcm_cache
+from audio_api.profiling import run_in_thread
+
 MODEL_TARGET_SR = 16000
 
 async def extract_audio_features(file_path: Path) -> Tuple[Dict[str, Any], np.ndarray, int]:
     """
     Asynchronously extracts features and loads audio data, ensuring the audio
-    is resampled to the model's required sample rate (16000 Hz).
+    is resampled to the model's required sample rate (16000 Hz). Decoded audio
+    is reused from the PCM disk cache when the same file was seen before.
 
     Returns:
         A tuple containing:
@@ -21,7 +24,7 @@ async def extract_audio_features(file_path: Path) -> Tuple[Dict[str, Any], np.nd
     """
     logger.info(f"Extracting features and loading data from {file_path}")
 
-    def _blocking_operation():
+    def _decode():
         try:
             y_orig, sr_orig = librosa.load(file_path, sr=None, mono=False)
             
@@ -38,18 +41,38 @@ async def extract_audio_features(file_path: Path) -> Tuple[Dict[str, Any], np.nd
             y_mono = librosa.to_mono(y_orig.copy()) if y_orig.ndim > 1 else y_orig
             
             if sr_orig != MODEL_TARGET_SR:
-                logger.debug(f"Resampling audio from {sr_orig}Hz to {MODEL_TARGET_SR}Hz.")
+                logger.debug("Resampling audio from {}Hz to {}Hz.", sr_orig, MODEL_TARGET_SR)
                 y_resampled = librosa.resample(y=y_mono.copy(), orig_sr=sr_orig, target_sr=MODEL_TARGET_SR)
             else:
                 y_resampled = y_mono
             
-            return original_features, y_resampled, sr_orig
+            return original_features, y_resampled
 
         except Exception as e:
             raise ValueError(f"Librosa failed to load or process file: {e}")
 
+    def _blocking_operation():
+        cache = get_pcm_cache()
+        try:
+            digest = file_digest(file_path) if cache is not None else None
+        except OSError:
+            digest = None
+
+        cached = cache.get(digest) if digest is not None else None
+        if cached is not None:
+            features, y_resampled = cached
+        else:
+            features, y_resampled = _decode()
+            if digest is not None:
+                try:
+                    cache.put(digest, features, y_resampled)
+                except OSError as e:
+                    logger.warning(f"Could not store decoded audio in PCM cache: {e}")
+
+        return features, y_resampled, MODEL_TARGET_SR
+
     try:
-        features, y_resampled, target_sr = await asyncio.to_thread(_blocking_operation)
+        features, y_resampled, target_sr = await run_in_thread(_blocking_operation)
         logger.success(f"Successfully extracted features: {features}")
         return features, y_resampled, target_sr
     except ValueError as e:
@@ -0,0 +1,299 @@
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import sys
+import time
+from functools import partial
+from pathlib import Path
+from typing import Any, Dict, Iterator, List
+
+from loguru import logger
+
+from audio_api import config, result_cache
+from audio_api.audio_downloader import download_audio_file
+from audio_api.audio_processor import extract_audio_features
+from audio_api.models import AnalyzeRequest, AudioFeaturesResponse
+
+AUDIO_SUFFIXES = {
+    ".aac",
+    ".aiff",
+    ".flac",
+    ".m4a",
+    ".mp3",
+    ".ogg",
+    ".opus",
+    ".wav",
+}
+
+
+def iter_manifest(source: Path) -> Iterator[Dict[str, str]]:
+    """
+    Yields `{"id", "url"}` or `{"id", "path"}` items from a directory (every
+    audio file below it) or a JSONL manifest whose lines are either a bare URL
+    or path string, or an object with a `url` or `path` key and optional `id`.
+    """
+    if source.is_dir():
+        for path in sorted(source.rglob("*")):
+            if path.suffix.lower() in AUDIO_SUFFIXES and path.is_file():
+                yield {"id": str(path), "path": str(path)}
+        return
+
+    with open(source) as fp:
+        for line_number, line in enumerate(fp, 1):
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            if isinstance(entry, str):
+                key = "url" if entry.startswith(("http://", "https://")) else "path"
+                entry = {key: entry}
+            if "url" not in entry and "path" not in entry:
+                raise ValueError(
+                    f"{source}:{line_number} has neither 'url' nor 'path'"
+                )
+            entry.setdefault("id", entry.get("url") or entry.get("path"))
+            yield entry
+
+
+def load_completed(output: Path) -> set[str]:
+    """
+    Returns the ids already processed successfully in `output`. A trailing
+    partial line left by an interrupted run is truncated so appending resumes
+    on a clean line.
+    """
+    if not output.exists():
+        return set()
+
+    with open(output, "rb+") as fp:
+        data = fp.read()
+        if data and not data.endswith(b"\n"):
+            fp.truncate(data.rfind(b"\n") + 1)
+            data = data[: data.rfind(b"\n") + 1]
+
+    completed = set()
+    for line in data.splitlines():
+        record = json.loads(line)
+        if record.get("status") == "ok":
+            completed.add(record["id"])
+    return completed
+
+
+def _init_worker(torch_threads: int):
+    """Loads one model per worker process and keeps logs quiet."""
+    import torch
+
+    from audio_api.ml_classifier import AudioClassificationModel
+
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+    torch.set_num_threads(torch_threads)
+    AudioClassificationModel()
+
+
+async def _prepare(item: Dict[str, str]) -> Dict[str, Any]:
+    """Downloads (for URLs) and decodes one item."""
+    if "url" in item:
+        temp_file_path = await download_audio_file(item["url"])
+        try:
+            features, y, _ = await extract_audio_features(temp_file_path)
+        finally:
+            temp_file_path.unlink(missing_ok=True)
+    else:
+        features, y, _ = await extract_audio_features(Path(item["path"]))
+    return {"features": features, "y": y}
+
+
+async def _prepare_batch(items: List[Dict[str, str]]) -> List[Any]:
+    return await asyncio.gather(
+        *(_prepare(item) for item in items), return_exceptions=True
+    )
+
+
+async def _populate_cache(records: List[Dict[str, Any]], compute_seconds: float):
+    import redis.asyncio as redis
+
+    client = redis.from_url(config.REDIS_URL, decode_responses=True)
+    try:
+        for record in records:
+            if record["status"] != "ok" or "url" not in record:
+                continue
+            data = AudioFeaturesResponse.model_validate(record)
+            # Normalized the way the API parses request URLs, so its lookups
+            # hit these entries.
+            audio_url = str(AnalyzeRequest(audio_url=record["url"]).audio_url)
+            await result_cache.write_cached(
+                client,
+                result_cache.cache_key_for(audio_url),
+                data,
+                compute_seconds,
+            )
+    finally:
+        await client.close()
+
+
+def process_batch(
+    items: List[Dict[str, str]], populate_cache: bool = False
+) -> List[Dict[str, Any]]:
+    """
+    Decodes a batch of items concurrently, classifies the decodable ones with
+    a single batched forward pass, and returns one result record per item.
+    """
+    from audio_api.ml_classifier import AudioClassificationModel
+
+    started = time.perf_counter()
+    prepared = asyncio.run(_prepare_batch(items))
+
+    records = [
+        {key: item[key] for key in ("id", "url", "path") if key in item}
+        for item in items
+    ]
+    ready = []
+    for record, result in zip(records, prepared):
+        if isinstance(result, Exception):
+            record.update(status="error", error=repr(result))
+        else:
+            ready.append((record, result))
+
+    if ready:
+        try:
+            labels = AudioClassificationModel().classify_batch(
+                [result["y"] for _, result in ready]
+            )
+        except Exception as e:
+            for record, _ in ready:
+                record.update(status="error", error=repr(e))
+        else:
+            for (record, result), label in zip(ready, labels):
+                record.update(result["features"], status="ok", classification=label)
+
+    if populate_cache:
+        elapsed = (time.perf_counter() - started) / len(items)
+        try:
+            asyncio.run(_populate_cache(records, elapsed))
+        except Exception as e:
+            logger.warning(f"Could not populate the Redis cache: {e!r}")
+
+    return records
+
+
+def _batches(
+    items: Iterator[Dict[str, str]], size: int
+) -> Iterator[List[Dict[str, str]]]:
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def run_batch(
+    source: Path,
+    output: Path,
+    workers: int,
+    batch_size: int,
+    populate_cache: bool = False,
+) -> Dict[str, int]:
+    """
+    Processes every manifest item not yet recorded as successful in `output`,
+    appending one JSON line per item as results arrive.
+    """
+    completed = load_completed(output)
+    pending = (
+        item for item in iter_manifest(source) if item["id"] not in completed
+    )
+    if completed:
+        logger.info(f"Resuming: {len(completed)} items already done in {output}")
+
+    counts = {"ok": 0, "error": 0}
+    torch_threads = max(1, (os.cpu_count() or 1) // workers)
+    context = multiprocessing.get_context("spawn")
+    started = time.perf_counter()
+
+    pool = context.Pool(
+        workers, initializer=_init_worker, initargs=(torch_threads,)
+    )
+    with pool, open(output, "a") as fp:
+        results = pool.imap_unordered(
+            partial(process_batch, populate_cache=populate_cache),
+            _batches(pending, batch_size),
+        )
+        for records in results:
+            for record in records:
+                fp.write(json.dumps(record) + "\n")
+                counts[record["status"]] += 1
+            # Every finished batch is durable before the next one is recorded.
+            fp.flush()
+            os.fsync(fp.fileno())
+
+            done = counts["ok"] + counts["error"]
+            rate = done / (time.perf_counter() - started)
+            logger.info(
+                "Processed {} items ({} failed), {:.1f} items/s",
+                done,
+                counts["error"],
+                rate,
+            )
+
+    return counts
+
+
+def _positive_int(value: str) -> int:
+    try:
+        number = int(value)
+    except ValueError:
+        number = 0
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"expected a positive integer, got {value!r}")
+    return number
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument(
+        "source",
+        type=Path,
+        help="JSONL manifest of URLs/paths, or a directory of audio files",
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        type=Path,
+        required=True,
+        help="JSONL results file; an existing file is resumed",
+    )
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=_positive_int,
+        default=os.cpu_count() or 1,
+        help="worker processes, each holding one model",
+    )
+    parser.add_argument(
+        "-b",
+        "--batch-size",
+        type=_positive_int,
+        default=8,
+        help="clips per forward pass",
+    )
+    parser.add_argument(
+        "--populate-cache",
+        action="store_true",
+        help="also write URL results to the Redis result cache",
+    )
+
+
+def main(args: argparse.Namespace):
+    counts = run_batch(
+        args.source,
+        args.output,
+        workers=args.workers,
+        batch_size=args.batch_size,
+        populate_cache=args.populate_cache,
+    )
+    logger.success(
+        f"Batch finished: {counts['ok']} succeeded, {counts['error']} failed."
+    )
+    return 1 if counts["error"] else 0
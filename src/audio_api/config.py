@@ -1,4 +1,5 @@
 import os
+import tempfile
 from typing import Final
 
 
@@ -21,4 +22,77 @@ REDIS_URL: Final[str] = os.getenv(
 
 CACHE_EXPIRATION_SECONDS: Final[int] = int(
     os.getenv("CACHE_EXPIRATION_SECONDS", 3600)
-)
\ No newline at end of file
+)
+
+# Past the soft TTL a cached result is still served, but a background refresh
+# recomputes it. CACHE_EXPIRATION_SECONDS is the hard TTL enforced by Redis.
+CACHE_SOFT_TTL_SECONDS: Final[int] = int(
+    os.getenv("CACHE_SOFT_TTL_SECONDS", 3000)
+)
+CACHE_EARLY_REFRESH_BETA: Final[float] = float(
+    os.getenv("CACHE_EARLY_REFRESH_BETA", 1.0)
+)
+CACHE_REFRESH_LOCK_SECONDS: Final[int] = int(
+    os.getenv("CACHE_REFRESH_LOCK_SECONDS", 120)
+)
+
+LOG_DIR: Final[str] = os.getenv("LOG_DIR", "logs")
+LOG_LEVEL: Final[str] = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FILE_LEVEL: Final[str] = os.getenv("LOG_FILE_LEVEL", "INFO").upper()
+LOG_JSON: Final[bool] = os.getenv("LOG_JSON", "0") == "1"
+LOG_DIAGNOSE: Final[bool] = os.getenv("LOG_DIAGNOSE", "0") == "1"
+
+# Fraction of requests whose verbose DEBUG traces are written to the trace
+# sink, e.g. 0.01 for 1%. Zero disables the trace sink entirely.
+LOG_TRACE_SAMPLE_RATE: Final[float] = float(
+    os.getenv("LOG_TRACE_SAMPLE_RATE", 0.0)
+)
+
+# Requests carrying this token in the X-Profile header (or the `profile` query
+# parameter) are profiled. Leave unset to disable profiling entirely.
+PROFILING_TOKEN: Final[str] = os.getenv("PROFILING_TOKEN", "")
+PROFILE_DIR: Final[str] = os.getenv("PROFILE_DIR", "profiles")
+PROFILE_SAMPLE_INTERVAL_MS: Final[float] = float(
+    os.getenv("PROFILE_SAMPLE_INTERVAL_MS", 5)
+)
+
+# Decoded 16 kHz mono PCM is cached on disk as memory-mappable .npy files,
+# keyed by the SHA-256 of the downloaded file. A budget of 0 disables it.
+PCM_CACHE_DIR: Final[str] = os.getenv(
+    "PCM_CACHE_DIR", os.path.join(tempfile.gettempdir(), "audio_api_pcm")
+)
+PCM_CACHE_MAX_BYTES: Final[int] = int(
+    os.getenv("PCM_CACHE_MAX_BYTES", 1024**3)
+)
+
+# Live streaming over WebSocket: each connection is classified on a rolling
+# window every hop; windows from all connections are batched for inference.
+STREAM_WINDOW_SECONDS: Final[float] = float(
+    os.getenv("STREAM_WINDOW_SECONDS", 5.0)
+)
+STREAM_HOP_SECONDS: Final[float] = float(os.getenv("STREAM_HOP_SECONDS", 1.0))
+STREAM_MAX_BATCH: Final[int] = int(os.getenv("STREAM_MAX_BATCH", 32))
+STREAM_BATCH_WAIT_MS: Final[float] = float(
+    os.getenv("STREAM_BATCH_WAIT_MS", 10)
+)
+
+# Model tiers, cheapest first: the librosa heuristic, the AST reading only the
+# first MODEL_SMALL_MAX_LENGTH spectrogram frames (10 ms each), and the full
+# AST. Requests with a latency budget get the best tier expected to fit it.
+MODEL_SMALL_MAX_LENGTH: Final[int] = int(os.getenv("MODEL_SMALL_MAX_LENGTH", 256))
+# Starting estimates of each tier's classification time, blended with an
+# exponentially weighted moving average of live measurements. The heuristic
+# is priced per second of audio, the AST tiers per clip.
+MODEL_TIER_PRIOR_MS: Final[dict[str, float]] = {
+    "heuristic": float(os.getenv("MODEL_TIER_HEURISTIC_PRIOR_MS", 2)),
+    "small": float(os.getenv("MODEL_TIER_SMALL_PRIOR_MS", 150)),
+    "full": float(os.getenv("MODEL_TIER_FULL_PRIOR_MS", 600)),
+}
+MODEL_TIER_EWMA_ALPHA: Final[float] = float(
+    os.getenv("MODEL_TIER_EWMA_ALPHA", 0.2)
+)
+# Without new measurements an estimate drifts back to its prior with this
+# half-life, so a tier priced out by a latency spike is eventually retried.
+MODEL_TIER_DECAY_HALF_LIFE_SECONDS: Final[float] = float(
+    os.getenv("MODEL_TIER_DECAY_HALF_LIFE_SECONDS", 300)
+)
@@ -1,13 +1,36 @@
+import random
+import re
 import sys
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
 from pathlib import Path
 from loguru import logger
 
+from audio_api import config
+
+REQUEST_ID_HEADER = "X-Request-ID"
+
+_VALID_REQUEST_ID = re.compile(r"^[A-Za-z0-9._-]{1,64}$")
+
+# Whether verbose traces are emitted for the current request. Set per request
+# by `request_context`; copied into `asyncio.to_thread` workers automatically.
+_trace_sampled: ContextVar[bool] = ContextVar("trace_sampled", default=False)
+_request_id: ContextVar[str | None] = ContextVar("request_id", default=None)
+
+# Set when a sink accepts DEBUG for every request, so tracing is always on.
+_trace_all = False
+
+
 def setup_logging():
     """
-    Configures Loguru to sink logs to both stderr and a rotating file.
+    Configures Loguru to sink logs to stderr, a rotating file and, when trace
+    sampling is enabled, a JSON trace file that only receives sampled requests.
     """
+    global _trace_all
+
     # Create the logs directory if it doesn't exist
-    log_dir = Path("logs")
+    log_dir = Path(config.LOG_DIR)
     log_dir.mkdir(exist_ok=True)
 
     # Define the log file path
@@ -16,26 +39,90 @@ def setup_logging():
     # Remove the default handler to prevent duplicate console logs
     logger.remove()
 
+    # Records logged outside a request still need a request_id for the formats.
+    logger.configure(extra={"request_id": "-", "sampled": False})
+
     # Add a handler for stderr (console) with a specific format and level
     # This is useful for development and seeing logs in Docker.
     logger.add(
         sys.stderr,
-        level="INFO",  # Log INFO level and above to the console
-        format="<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>"
+        level=config.LOG_LEVEL,
+        format="<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level: <8}</level> | <yellow>{extra[request_id]}</yellow> | <cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>"
     )
 
     # Add a handler for the log file
-    # This will create a new log file when it reaches 10 MB or at midnight.
+    # This will create a new log file when it reaches 10 MB.
     # It will keep up to 5 old log files.
     logger.add(
         log_file_path,
-        level="DEBUG",  # Log DEBUG level and above to the file
+        level=config.LOG_FILE_LEVEL,
         rotation="10 MB",  # Rotate the log file when it reaches 10 MB
         retention=5, # Keep up to 5 old log files
         enqueue=True,      # Make logging non-blocking (important for async)
         backtrace=True,    # Show full stack traces for exceptions
-        diagnose=True,     # Add exception variable values for easier debugging
-        format="{time} {level} {message}" # A simpler format for file logs
+        diagnose=config.LOG_DIAGNOSE,  # Exception variable values; may leak data
+        serialize=config.LOG_JSON,     # One JSON object per line
+        format="{time} {level} {extra[request_id]} {message}" # A simpler format for file logs
+    )
+
+    # Sampled requests log their verbose DEBUG traces to a separate JSON sink.
+    if config.LOG_TRACE_SAMPLE_RATE > 0:
+        logger.add(
+            log_dir / "audio_api.trace.log",
+            level="DEBUG",
+            rotation="10 MB",
+            retention=5,
+            enqueue=True,
+            serialize=True,
+            filter=lambda record: record["extra"]["sampled"],
+        )
+
+    _trace_all = "DEBUG" in (config.LOG_LEVEL, config.LOG_FILE_LEVEL)
+
+    logger.info(
+        "Logging configured: console ({}), file ({}), trace sample rate {}.",
+        config.LOG_LEVEL,
+        config.LOG_FILE_LEVEL,
+        config.LOG_TRACE_SAMPLE_RATE,
     )
 
-    logger.info("Logging configured: Sinking to console (INFO) and file (DEBUG).")
\ No newline at end of file
+
+def current_request_id() -> str | None:
+    """The correlation id of the request being handled, if any."""
+    return _request_id.get()
+
+
+def tracing_enabled() -> bool:
+    """Cheap guard for verbose logging on hot paths."""
+    return _trace_all or _trace_sampled.get()
+
+
+def trace(message: str, *args, **kwargs):
+    """
+    Logs a DEBUG message only if the current request is traced. Arguments are
+    formatted by Loguru, so nothing is built when tracing is off.
+    """
+    if _trace_all or _trace_sampled.get():
+        logger.opt(depth=1).debug(message, *args, **kwargs)
+
+
+@contextmanager
+def request_context(request_id: str | None = None, sampled: bool | None = None):
+    """
+    Binds a correlation id to every log record emitted while handling one
+    request, including records from threads started via `asyncio.to_thread`,
+    and decides whether this request's verbose traces are sampled.
+    """
+    if not request_id or not _VALID_REQUEST_ID.match(request_id):
+        request_id = uuid.uuid4().hex
+    if sampled is None:
+        sampled = random.random() < config.LOG_TRACE_SAMPLE_RATE
+
+    sampled_token = _trace_sampled.set(sampled)
+    request_id_token = _request_id.set(request_id)
+    try:
+        with logger.contextualize(request_id=request_id, sampled=sampled):
+            yield request_id
+    finally:
+        _request_id.reset(request_id_token)
+        _trace_sampled.reset(sampled_token)
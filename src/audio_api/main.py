@@ -1,30 +1,48 @@
+import time
 from pathlib import Path
 from contextlib import asynccontextmanager
 
 import httpx
 import redis.asyncio as redis
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import (
+    BackgroundTasks,
+    FastAPI,
+    HTTPException,
+    Request,
+    WebSocket,
+    status,
+)
 from loguru import logger
 
 from audio_api.audio_downloader import download_audio_file
 from audio_api.audio_processor import extract_audio_features
-from audio_api.audio_classifier import classify_audio
 from audio_api.models import (
+    DEFAULT_MODEL_TIER,
     AnalyzeRequest,
     AudioFeaturesResponse,
     SuccessResponse,
 )
-from audio_api.ml_classifier import classify_audio_with_model
-from audio_api import config
-from audio_api.log_config import setup_logging
+from audio_api.model_tiers import QUALITY_TIERS, classify_with_tier, get_registry
+from audio_api import config, profiling, result_cache, streaming
+from audio_api.log_config import (
+    REQUEST_ID_HEADER,
+    current_request_id,
+    request_context,
+    setup_logging,
+)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     setup_logging()
     app.state.redis = redis.from_url(config.REDIS_URL, decode_responses=True)
     logger.info("Successfully connected to Redis.")
+    app.state.stream_batcher = streaming.InferenceBatcher(
+        streaming.model_probabilities
+    )
+    app.state.stream_batcher.start()
     yield
 
+    await app.state.stream_batcher.stop()
     await app.state.redis.close()
     logger.info("Redis connection closed.")
 
@@ -37,6 +55,43 @@ app = FastAPI(
 )
 
 
+async def profiling_middleware(request: Request, call_next):
+    """
+    Profiles requests that carry the profiling token and reports the stage
+    breakdown in a Server-Timing header. Results are saved to PROFILE_DIR.
+    """
+    profile, track_memory = profiling.requested_mode(
+        request.headers, request.query_params
+    )
+    if not profile:
+        return await call_next(request)
+
+    async with profiling.profile_request(
+        current_request_id(), track_memory
+    ) as request_profile:
+        response = await call_next(request)
+    response.headers["Server-Timing"] = request_profile.server_timing()
+    response.headers[profiling.PROFILE_ID_HEADER] = request_profile.profile_id
+    return response
+
+
+# Only installed when a token is configured, so requests pay nothing otherwise.
+if config.PROFILING_TOKEN:
+    app.middleware("http")(profiling_middleware)
+
+
+@app.middleware("http")
+async def correlation_id_middleware(request: Request, call_next):
+    """
+    Tags every log record of a request with a correlation id, taken from the
+    X-Request-ID header when the caller supplies one, and echoes it back.
+    """
+    with request_context(request.headers.get(REQUEST_ID_HEADER)) as request_id:
+        response = await call_next(request)
+    response.headers[REQUEST_ID_HEADER] = request_id
+    return response
+
+
 def cleanup_file(path: Path):
     """Utility function to remove a file and log it."""
     if path.exists():
@@ -44,68 +99,202 @@ def cleanup_file(path: Path):
         logger.info(f"Cleaned up temporary file: {path}")
 
 
+async def run_analysis(
+    audio_url: str,
+    model_tier: str = DEFAULT_MODEL_TIER,
+    deadline: float | None = None,
+) -> tuple[AudioFeaturesResponse, float]:
+    """
+    Downloads, analyzes and classifies the audio at `audio_url`.
+
+    `model_tier` is used as is, unless a `deadline` (a `time.perf_counter()`
+    value) is given: then, once the audio is decoded and its length known,
+    the best tier up to `model_tier` expected to classify it in the time
+    left is chosen.
+
+    Returns the response data and the wall-clock seconds the analysis took,
+    which the cache uses to schedule early refreshes.
+    """
+    registry = get_registry()
+    started = time.perf_counter()
+    with profiling.stage("download"):
+        temp_file_path = await download_audio_file(audio_url)
+    try:
+        with profiling.stage("extract"):
+            features, y_mono, sr = await extract_audio_features(temp_file_path)
+
+        if deadline is None:
+            tier = registry.get(model_tier)
+        else:
+            tier = registry.select(
+                deadline - time.perf_counter(),
+                best=model_tier,
+                duration=len(y_mono) / sr,
+            )
+
+        with profiling.stage("classify"):
+            classification = await classify_with_tier(tier, y_mono, sr)
+    finally:
+        cleanup_file(temp_file_path)
+
+    response_data = AudioFeaturesResponse(
+        duration=features["duration"],
+        sample_rate=features["sample_rate"],
+        channels=features["channels"],
+        classification=classification,
+        model_tier=tier.name,
+    )
+    return response_data, time.perf_counter() - started
+
+
+async def refresh_cached_result(
+    redis_client,
+    cache_key: str,
+    audio_url: str,
+    model_tier: str = DEFAULT_MODEL_TIER,
+):
+    """
+    Recomputes a stale cache entry in the background with the tier that
+    produced it. Failures are logged and swallowed so the stale copy keeps
+    being served until its hard TTL.
+    """
+    if not await result_cache.try_acquire_refresh(redis_client, cache_key):
+        return
+
+    try:
+        logger.info(f"Refreshing cached result for URL: {audio_url}")
+        response_data, elapsed = await run_analysis(audio_url, model_tier)
+        await result_cache.write_cached(
+            redis_client, cache_key, response_data, elapsed
+        )
+    except Exception as e:
+        logger.warning(f"Background refresh failed for {audio_url}: {e!r}")
+    finally:
+        await result_cache.release_refresh(redis_client, cache_key)
+
+
 @app.post("/analyze-audio", response_model=SuccessResponse)
 async def analyze_audio_endpoint(
     request: AnalyzeRequest, background_tasks: BackgroundTasks
 ):
     """
     Accepts an audio file URL, downloads and analyzes it, and returns classification.
-    Results are cached in Redis
+    The model tier is chosen from the optional latency budget and quality hint
+    and reported in the response. Results are cached in Redis per tier; stale
+    entries are served while being refreshed.
     """
-    cache_key = f"audio_cache:{request.audio_url}"
-    temp_file_path: Path | None = None
+    started = time.perf_counter()
+    audio_url = str(request.audio_url)
+    registry = get_registry()
+    best = QUALITY_TIERS[request.quality] if request.quality else DEFAULT_MODEL_TIER
+    deadline = None
+    if request.latency_budget_ms:
+        deadline = started + request.latency_budget_ms / 1000
+    # The best tier that could answer in time; the final choice is made once
+    # the audio is decoded and may be cheaper.
+    tier = registry.select(
+        deadline - started if deadline is not None else None, best=best
+    )
 
     try:
-        logger.info(f"Received request for URL: {request.audio_url}")
-        cached_result = await app.state.redis.get(cache_key)
-        if cached_result:
-            logger.success(f"Cache hit for URL: {request.audio_url}")
-            cached_data = AudioFeaturesResponse.model_validate_json(
-                cached_result
+        logger.info(f"Received request for URL: {audio_url} (tier: {tier.name})")
+        with profiling.stage("cache_read"):
+            # A cached answer from the chosen tier or a better one is served;
+            # the best tier present wins.
+            candidate_key, cached = await result_cache.read_first_cached(
+                app.state.redis,
+                [
+                    result_cache.cache_key_for(audio_url, candidate.name)
+                    for candidate in registry.at_least(tier)
+                ],
             )
-            return SuccessResponse(data=cached_data)
-
-        logger.info(
-            f"Cache miss for URL: {request.audio_url}. Starting analysis."
-        )
+        if cached:
+            logger.success(f"Cache hit for URL: {audio_url}")
+            if result_cache.needs_refresh(cached):
+                background_tasks.add_task(
+                    refresh_cached_result,
+                    app.state.redis,
+                    candidate_key,
+                    audio_url,
+                    cached.data.model_tier,
+                )
+            return SuccessResponse(data=cached.data)
 
-        temp_file_path = await download_audio_file(str(request.audio_url))
-        background_tasks.add_task(cleanup_file, temp_file_path)
+        logger.info(f"Cache miss for URL: {audio_url}. Starting analysis.")
 
-        features, y_mono, sr = await extract_audio_features(temp_file_path)
-
-        classification = await classify_audio_with_model(y_mono, sr)
-
-        response_data = AudioFeaturesResponse(
-            duration=features["duration"],
-            sample_rate=features["sample_rate"],
-            channels=features["channels"],
-            classification=classification,
+        response_data, elapsed = await run_analysis(
+            audio_url, tier.name, deadline
         )
 
-        await app.state.redis.set(
-            cache_key,
-            response_data.model_dump_json(),
-            ex=config.CACHE_EXPIRATION_SECONDS,
-        )
+        with profiling.stage("cache_write"):
+            await result_cache.write_cached(
+                app.state.redis,
+                result_cache.cache_key_for(audio_url, response_data.model_tier),
+                response_data,
+                elapsed,
+            )
 
         return SuccessResponse(data=response_data)
 
     except (ValueError, httpx.RequestError, httpx.HTTPStatusError) as e:
         logger.error(f"A known error occurred: {e}")
-        if temp_file_path:
-            cleanup_file(temp_file_path)
         raise HTTPException(status_code=400, detail=str(e))
 
     except Exception as e:
         logger.exception(f"An unexpected internal server error occurred: {e}")
-        if temp_file_path:
-            cleanup_file(temp_file_path)
         raise HTTPException(
             status_code=500, detail="An internal server error occurred."
         )
 
 
+@app.websocket("/stream")
+async def stream_endpoint(
+    websocket: WebSocket,
+    sample_rate: int = 16000,
+    channels: int = 1,
+    encoding: str = "pcm_s16le",
+    window: float = config.STREAM_WINDOW_SECONDS,
+    hop: float = config.STREAM_HOP_SECONDS,
+):
+    """
+    Classifies a live audio stream. Send raw PCM (`encoding=pcm_s16le` or
+    `pcm_f32le`, interleaved, at `sample_rate`) or an encoded stream
+    (`encoding=encoded`) as binary frames, then `{"event": "end"}` to finish.
+    Every `hop` seconds the last `window` seconds are classified and a JSON
+    message with `start`, `end`, `classification` and `probabilities` is sent.
+    """
+    if (
+        encoding not in streaming.ENCODINGS
+        or not 0 < sample_rate <= 384000
+        or not 1 <= channels <= 8
+        or not streaming.MIN_HOP_SECONDS <= hop <= window <= 30
+    ):
+        await websocket.close(
+            code=status.WS_1008_POLICY_VIOLATION, reason="Invalid stream parameters."
+        )
+        return
+
+    with request_context():
+        await websocket.accept()
+        logger.info(
+            "Stream opened: {} at {} Hz, {} channel(s), hop {}s, window {}s",
+            encoding,
+            sample_rate,
+            channels,
+            hop,
+            window,
+        )
+        await streaming.stream_classification(
+            websocket,
+            websocket.app.state.stream_batcher,
+            sample_rate=sample_rate,
+            channels=channels,
+            encoding=encoding,
+            window=window,
+            hop=hop,
+        )
+
+
 @app.get("/")
 def read_root():
     return {
@@ -113,7 +302,31 @@ def read_root():
     }
 
 
-def main():
+def main(argv: list[str] | None = None):
+    """
+    Command-line entry point. `audio-api` (or `audio-api serve`) starts the
+    HTTP server; `audio-api batch` analyzes a manifest offline.
+    """
+    import argparse
+
+    from audio_api import batch
+
+    parser = argparse.ArgumentParser(
+        prog="audio-api", description=config.API_DESCRIPTION
+    )
+    subcommands = parser.add_subparsers(dest="command")
+    subcommands.add_parser("serve", help="run the HTTP API (default)")
+    batch.add_arguments(
+        subcommands.add_parser(
+            "batch", help="analyze a manifest or directory without the HTTP server"
+        )
+    )
+    args = parser.parse_args(argv)
+
+    if args.command == "batch":
+        setup_logging()
+        raise SystemExit(batch.main(args))
+
     import uvicorn
     uvicorn.run(app, host=config.API_HOST, port=config.API_PORT)
 
@@ -0,0 +1,166 @@
+import time
+from typing import Callable, Dict, List
+
+import numpy as np
+from loguru import logger
+
+from audio_api import config
+from audio_api.audio_classifier import classify_heuristic
+from audio_api.ml_classifier import AudioClassificationModel
+from audio_api.models import DEFAULT_MODEL_TIER
+from audio_api.profiling import run_in_thread
+
+# Quality hints map to the best tier a request will accept.
+QUALITY_TIERS = {"low": "heuristic", "medium": "small", "high": "full"}
+
+# Clip length assumed for tiers whose cost grows with the audio when the
+# duration is not known yet (before download): the AST's full input length.
+REFERENCE_DURATION_SECONDS = 10.24
+
+
+class ModelTier:
+    """
+    One way of classifying audio, with a live estimate of its classification
+    latency.
+
+    The estimate is an exponentially weighted moving average of observed
+    classify times, starting from (and blended with) a prior. Tiers whose
+    cost grows with the clip, like the heuristic, track seconds per second
+    of audio; the AST tiers pad or crop every clip to a fixed input, so
+    they track seconds per call. Without fresh observations the estimate
+    decays back towards the prior, so a tier priced out by a slow spike is
+    eventually tried, and re-measured, again.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        classify: Callable[[np.ndarray, int], str],
+        prior_seconds: float,
+        per_audio_second: bool = False,
+        alpha: float = config.MODEL_TIER_EWMA_ALPHA,
+        half_life: float = config.MODEL_TIER_DECAY_HALF_LIFE_SECONDS,
+    ):
+        self.name = name
+        self.classify = classify
+        self.prior_seconds = prior_seconds
+        self.per_audio_second = per_audio_second
+        self.alpha = alpha
+        self.half_life = half_life
+        self.observations = 0
+        self._estimate = prior_seconds
+        self._updated_at = time.monotonic()
+
+    def _current(self, now: float) -> float:
+        age = max(0.0, now - self._updated_at)
+        weight = 0.5 ** (age / self.half_life) if self.half_life > 0 else 1.0
+        return self.prior_seconds + (self._estimate - self.prior_seconds) * weight
+
+    def expected_seconds(
+        self, duration: float | None = None, now: float | None = None
+    ) -> float:
+        """Expected classify time for a clip of `duration` seconds."""
+        unit = self._current(time.monotonic() if now is None else now)
+        if not self.per_audio_second:
+            return unit
+        return unit * (REFERENCE_DURATION_SECONDS if duration is None else duration)
+
+    def observe(self, seconds: float, duration: float, now: float | None = None):
+        """Records how long classifying a `duration`-second clip took."""
+        now = time.monotonic() if now is None else now
+        if self.per_audio_second:
+            seconds /= max(duration, 1e-3)
+        current = self._current(now)
+        self._estimate = current + self.alpha * (seconds - current)
+        self._updated_at = now
+        self.observations += 1
+
+
+class ModelTierRegistry:
+    """Model tiers ordered from cheapest (and least accurate) to best."""
+
+    def __init__(self, tiers: List[ModelTier]):
+        self.tiers = tiers
+        self._by_name: Dict[str, ModelTier] = {tier.name: tier for tier in tiers}
+
+    def get(self, name: str) -> ModelTier:
+        return self._by_name[name]
+
+    def select(
+        self,
+        budget_seconds: float | None = None,
+        best: str = DEFAULT_MODEL_TIER,
+        duration: float | None = None,
+    ) -> ModelTier:
+        """
+        Picks the tier for a request. `best` caps how expensive a tier may
+        be. Within that cap, the budget rules out tiers expected to take
+        longer to classify a `duration`-second clip, and the best remaining
+        tier is used; if none is expected to fit, the cheapest one answers.
+        """
+        candidates = self.tiers[: self.tiers.index(self.get(best)) + 1]
+        if budget_seconds is None:
+            return candidates[-1]
+
+        for tier in reversed(candidates):
+            if tier.expected_seconds(duration) <= budget_seconds:
+                return tier
+        return candidates[0]
+
+    def at_least(self, tier: ModelTier) -> List[ModelTier]:
+        """`tier` and every better one, best first: acceptable cached answers."""
+        return self.tiers[self.tiers.index(tier) :][::-1]
+
+
+def _classify_small(y: np.ndarray, sr: int) -> str:
+    model = AudioClassificationModel().variant(config.MODEL_SMALL_MAX_LENGTH)
+    return model.classify(y, sr)
+
+
+def _classify_full(y: np.ndarray, sr: int) -> str:
+    return AudioClassificationModel().classify(y, sr)
+
+
+def default_registry() -> ModelTierRegistry:
+    priors = config.MODEL_TIER_PRIOR_MS
+    return ModelTierRegistry(
+        [
+            ModelTier(
+                "heuristic",
+                classify_heuristic,
+                priors["heuristic"] / 1000,
+                per_audio_second=True,
+            ),
+            ModelTier("small", _classify_small, priors["small"] / 1000),
+            ModelTier(DEFAULT_MODEL_TIER, _classify_full, priors["full"] / 1000),
+        ]
+    )
+
+
+_registry: ModelTierRegistry | None = None
+
+
+def get_registry() -> ModelTierRegistry:
+    """The process-wide registry, whose latency estimates all requests share."""
+    global _registry
+    if _registry is None:
+        _registry = default_registry()
+    return _registry
+
+
+async def classify_with_tier(tier: ModelTier, y: np.ndarray, sr: int) -> str:
+    """
+    Classifies off the event loop with the given tier and feeds the measured
+    time into the tier's latency estimate. `y` must be sampled at `sr`.
+    """
+    started = time.perf_counter()
+    classification = await run_in_thread(tier.classify, y, sr)
+    elapsed = time.perf_counter() - started
+    tier.observe(elapsed, duration=len(y) / sr)
+    logger.info(
+        "Audio classified via {} tier as: {} ({:.1f} ms)",
+        tier.name,
+        classification,
+        elapsed * 1000,
+    )
+    return classification
@@ -1,9 +1,22 @@
-from pydantic import BaseModel, HttpUrl
+from typing import Literal
+
+from pydantic import BaseModel, Field, HttpUrl
+
+# The tier that answers requests without a budget or quality hint, and whose
+# results are cached under the original, tier-less keys.
+DEFAULT_MODEL_TIER = "full"
+
 
 class AnalyzeRequest(BaseModel):
     """The request model for the API endpoint."""
 
     audio_url: HttpUrl
+    # How long the caller is willing to wait; cheaper model tiers are used
+    # when the full model is not expected to answer in time.
+    latency_budget_ms: float | None = Field(default=None, gt=0)
+    # The best quality wanted: "low" is the heuristic, "medium" the
+    # reduced-input model, "high" (the default) the full model.
+    quality: Literal["low", "medium", "high"] | None = None
 
 
 class AudioFeaturesResponse(BaseModel):
@@ -13,10 +26,19 @@ class AudioFeaturesResponse(BaseModel):
     sample_rate: int
     channels: int
     classification: str
+    model_tier: str = DEFAULT_MODEL_TIER
 
 
 class SuccessResponse(BaseModel):
     """The top-level success response model."""
 
     status: str = "success"
-    data: AudioFeaturesResponse
\ No newline at end of file
+    data: AudioFeaturesResponse
+
+
+class CachedAnalysis(BaseModel):
+    """A cached analysis result plus the bookkeeping needed to refresh it."""
+
+    data: AudioFeaturesResponse
+    computed_at: float
+    compute_seconds: float
@@ -0,0 +1,109 @@
+import hashlib
+import json
+import os
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Tuple
+
+import numpy as np
+from loguru import logger
+
+from audio_api import config
+
+
+def file_digest(path: Path) -> str:
+    """SHA-256 of a file's contents, used as the cache key."""
+    with open(path, "rb") as fp:
+        return hashlib.file_digest(fp, "sha256").hexdigest()
+
+
+class PCMCache:
+    """
+    Disk cache of decoded, resampled audio.
+
+    Each entry is a `<digest>.npy` file holding float32 mono PCM plus a
+    `<digest>.json` sidecar with the original features. Arrays are loaded with
+    `mmap_mode="r"`, so worker processes reading the same entry share the OS
+    page cache instead of each holding a private copy. Recency is tracked
+    through the file mtime, which `get` bumps; `put` evicts least recently
+    used entries until the total size fits the budget.
+
+    Writes go through a temporary file and `os.replace`, so concurrent
+    processes never observe a partially written entry.
+    """
+
+    def __init__(self, directory: Path, max_bytes: int):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _paths(self, digest: str) -> Tuple[Path, Path]:
+        return self.directory / f"{digest}.npy", self.directory / f"{digest}.json"
+
+    def get(self, digest: str) -> Tuple[Dict[str, Any], np.ndarray] | None:
+        pcm_path, meta_path = self._paths(digest)
+        try:
+            features = json.loads(meta_path.read_text())
+            y = np.load(pcm_path, mmap_mode="r")
+            os.utime(pcm_path)
+        except (FileNotFoundError, ValueError):
+            return None
+
+        logger.debug("PCM cache hit for {}", digest)
+        return features, y
+
+    def put(self, digest: str, features: Dict[str, Any], y: np.ndarray):
+        pcm_path, meta_path = self._paths(digest)
+        y = np.ascontiguousarray(y, dtype=np.float32)
+        if y.nbytes > self.max_bytes:
+            return
+
+        tmp_suffix = f".{uuid.uuid4().hex}.tmp"
+        tmp_pcm = pcm_path.with_name(pcm_path.name + tmp_suffix)
+        tmp_meta = meta_path.with_name(meta_path.name + tmp_suffix)
+        try:
+            with open(tmp_pcm, "wb") as fp:
+                np.save(fp, y)
+            tmp_meta.write_text(json.dumps(features))
+            # The array goes in first: an entry only counts once its
+            # metadata exists.
+            os.replace(tmp_pcm, pcm_path)
+            os.replace(tmp_meta, meta_path)
+        finally:
+            tmp_pcm.unlink(missing_ok=True)
+            tmp_meta.unlink(missing_ok=True)
+
+        self.evict()
+
+    def evict(self):
+        """Removes least recently used entries until the cache fits its budget."""
+        entries = []
+        for pcm_path in self.directory.glob("*.npy"):
+            try:
+                stat = pcm_path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, pcm_path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, pcm_path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            # Readers that already mapped the file keep a valid mapping.
+            pcm_path.with_suffix(".json").unlink(missing_ok=True)
+            pcm_path.unlink(missing_ok=True)
+            total -= size
+            logger.debug("Evicted {} from PCM cache", pcm_path.name)
+
+
+_cache: PCMCache | None = None
+
+
+def get_pcm_cache() -> PCMCache | None:
+    """The process-wide cache, or None when PCM_CACHE_MAX_BYTES is 0."""
+    global _cache
+    if config.PCM_CACHE_MAX_BYTES <= 0:
+        return None
+    if _cache is None:
+        _cache = PCMCache(Path(config.PCM_CACHE_DIR), config.PCM_CACHE_MAX_BYTES)
+    return _cache
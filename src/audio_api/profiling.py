@@ -0,0 +1,239 @@
+import asyncio
+import hmac
+import json
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from collections import Counter
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Callable
+
+from loguru import logger
+
+from audio_api import config
+
+PROFILE_HEADER = "X-Profile"
+PROFILE_MEMORY_HEADER = "X-Profile-Memory"
+PROFILE_ID_HEADER = "X-Profile-Id"
+
+TOP_ALLOCATIONS = 15
+
+# The profile of the request being handled. Outside profiled requests this is
+# None and every hook below reduces to a single ContextVar lookup.
+_active_profile: ContextVar["RequestProfile | None"] = ContextVar(
+    "active_profile", default=None
+)
+
+# tracemalloc and the sampler are process-wide, so profiled requests run one
+# at a time.
+_profile_lock = asyncio.Lock()
+
+
+class RequestProfile:
+    """
+    Sampling profiler scoped to a single request.
+
+    A background thread periodically snapshots the stacks of the threads the
+    request runs on: the event-loop thread plus any worker thread entered via
+    `run_in_thread`. Other coroutines interleaved on the event loop may show
+    up in its samples as well.
+    """
+
+    def __init__(self, request_id: str | None = None, track_memory: bool = False):
+        self.profile_id = request_id or uuid.uuid4().hex
+        self.track_memory = track_memory
+        self.interval = config.PROFILE_SAMPLE_INTERVAL_MS / 1000
+        self.stages: list[dict[str, Any]] = []
+        self.stacks: Counter[str] = Counter()
+        self.samples = 0
+        self.wall_seconds = 0.0
+        self.peak_memory_bytes: int | None = None
+        self.top_allocations: list[dict[str, Any]] = []
+
+        self._threads: dict[int, str] = {}
+        self._threads_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._sampler: threading.Thread | None = None
+        self._started_tracemalloc = False
+        self._started_at = 0.0
+
+    def register_thread(self, label: str):
+        with self._threads_lock:
+            self._threads[threading.get_ident()] = label
+
+    def unregister_thread(self):
+        with self._threads_lock:
+            self._threads.pop(threading.get_ident(), None)
+
+    def start(self):
+        if self.track_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started_tracemalloc = True
+            tracemalloc.reset_peak()
+
+        self.register_thread("event-loop")
+        self._sampler = threading.Thread(
+            target=self._sample_loop, name="request-profiler", daemon=True
+        )
+        self._started_at = time.perf_counter()
+        self._sampler.start()
+
+    def stop(self):
+        self.wall_seconds = time.perf_counter() - self._started_at
+        self._stop.set()
+        self._sampler.join()
+
+        if self.track_memory:
+            _, self.peak_memory_bytes = tracemalloc.get_traced_memory()
+            snapshot = tracemalloc.take_snapshot()
+            if self._started_tracemalloc:
+                tracemalloc.stop()
+            self.top_allocations = [
+                {
+                    "location": str(stat.traceback),
+                    "size_bytes": stat.size,
+                    "count": stat.count,
+                }
+                for stat in snapshot.statistics("lineno")[:TOP_ALLOCATIONS]
+            ]
+
+    def _sample_loop(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            with self._threads_lock:
+                threads = list(self._threads.items())
+            for thread_id, label in threads:
+                frame = frames.get(thread_id)
+                if frame is None or thread_id == own_id:
+                    continue
+                self.stacks[_collapse(label, frame)] += 1
+            self.samples += 1
+
+    def record_stage(self, name: str, seconds: float):
+        stage: dict[str, Any] = {"name": name, "seconds": round(seconds, 6)}
+        if self.track_memory:
+            # Peak since the previous stage ended, then start a new window.
+            stage["peak_memory_bytes"] = tracemalloc.get_traced_memory()[1]
+            tracemalloc.reset_peak()
+        self.stages.append(stage)
+
+    def server_timing(self) -> str:
+        """Formats the stage breakdown as a Server-Timing header value."""
+        return ", ".join(
+            f"{stage['name']};dur={stage['seconds'] * 1000:.1f}"
+            for stage in self.stages
+        )
+
+    def save(self, directory: Path) -> Path:
+        """
+        Writes `<id>.collapsed` (one `frame;frame;frame count` line per stack,
+        ready for flamegraph.pl or speedscope) and a `<id>.json` report.
+        """
+        directory.mkdir(parents=True, exist_ok=True)
+        flamegraph_path = directory / f"{self.profile_id}.collapsed"
+        flamegraph_path.write_text(
+            "".join(f"{stack} {count}\n" for stack, count in self.stacks.items())
+        )
+
+        report_path = directory / f"{self.profile_id}.json"
+        report = {
+            "profile_id": self.profile_id,
+            "wall_seconds": round(self.wall_seconds, 6),
+            "sample_interval_ms": config.PROFILE_SAMPLE_INTERVAL_MS,
+            "samples": self.samples,
+            "stages": self.stages,
+            "peak_memory_bytes": self.peak_memory_bytes,
+            "top_allocations": self.top_allocations,
+            "flamegraph": flamegraph_path.name,
+        }
+        report_path.write_text(json.dumps(report, indent=2))
+        return report_path
+
+
+def _collapse(label: str, frame) -> str:
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        location = f"{Path(code.co_filename).name}:{frame.f_lineno}"
+        names.append(f"{code.co_name} ({location})")
+        frame = frame.f_back
+    names.append(label)
+    return ";".join(name.replace(";", ":") for name in reversed(names))
+
+
+def requested_mode(headers, query_params) -> tuple[bool, bool]:
+    """
+    Returns (profile, track_memory) for a request. Profiling requires the
+    configured token, so it can't be triggered by arbitrary callers.
+    """
+    if not config.PROFILING_TOKEN:
+        return False, False
+
+    token = headers.get(PROFILE_HEADER) or query_params.get("profile")
+    if not token or not hmac.compare_digest(
+        token.encode(), config.PROFILING_TOKEN.encode()
+    ):
+        return False, False
+
+    memory_flag = headers.get(PROFILE_MEMORY_HEADER) or query_params.get(
+        "profile_memory"
+    )
+    return True, memory_flag == "1"
+
+
+@asynccontextmanager
+async def profile_request(request_id: str | None = None, track_memory: bool = False):
+    """Profiles everything awaited inside the block and saves the results."""
+    async with _profile_lock:
+        profile = RequestProfile(request_id, track_memory)
+        token = _active_profile.set(profile)
+        profile.start()
+        try:
+            yield profile
+        finally:
+            profile.stop()
+            _active_profile.reset(token)
+            report_path = await asyncio.to_thread(
+                profile.save, Path(config.PROFILE_DIR)
+            )
+            logger.info("Saved request profile to {}", report_path)
+
+
+@contextmanager
+def stage(name: str):
+    """Times a named stage of the current request when it is being profiled."""
+    profile = _active_profile.get()
+    if profile is None:
+        yield
+        return
+
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.record_stage(name, time.perf_counter() - started)
+
+
+async def run_in_thread(func: Callable, /, *args, **kwargs):
+    """
+    Drop-in replacement for `asyncio.to_thread` that lets the profiler sample
+    the worker thread while it runs on behalf of a profiled request.
+    """
+    profile = _active_profile.get()
+    if profile is None:
+        return await asyncio.to_thread(func, *args, **kwargs)
+
+    def _profiled():
+        profile.register_thread(f"worker:{getattr(func, '__name__', 'call')}")
+        try:
+            return func(*args, **kwargs)
+        finally:
+            profile.unregister_thread()
+
+    return await asyncio.to_thread(_profiled)
@@ -0,0 +1,114 @@
+import math
+import random
+import time
+from typing import Callable
+
+from loguru import logger
+from pydantic import ValidationError
+
+from audio_api import config
+from audio_api.models import (
+    DEFAULT_MODEL_TIER,
+    AudioFeaturesResponse,
+    CachedAnalysis,
+)
+
+CACHE_KEY_PREFIX = "audio_cache:"
+REFRESH_LOCK_PREFIX = "audio_cache_refresh:"
+
+
+def cache_key_for(audio_url: str, model_tier: str = DEFAULT_MODEL_TIER) -> str:
+    """
+    Results of the default tier keep the original key; other tiers get their
+    own, so a cheap answer never shadows a full-model one.
+    """
+    if model_tier == DEFAULT_MODEL_TIER:
+        return f"{CACHE_KEY_PREFIX}{audio_url}"
+    return f"{CACHE_KEY_PREFIX}{model_tier}:{audio_url}"
+
+
+async def read_cached(redis_client, key: str) -> CachedAnalysis | None:
+    """
+    Loads a cached analysis. Entries written before soft TTLs existed hold a
+    bare AudioFeaturesResponse; they are returned as already stale.
+    """
+    raw = await redis_client.get(key)
+    if not raw:
+        return None
+    return _parse_entry(raw)
+
+
+async def read_first_cached(
+    redis_client, keys: list[str]
+) -> tuple[str, CachedAnalysis] | tuple[None, None]:
+    """
+    Loads the first of `keys` holding an entry, fetching them all in a single
+    round-trip. Returns the key with its entry, or `(None, None)`.
+    """
+    for key, raw in zip(keys, await redis_client.mget(keys)):
+        if raw:
+            return key, _parse_entry(raw)
+    return None, None
+
+
+def _parse_entry(raw: str) -> CachedAnalysis:
+    try:
+        return CachedAnalysis.model_validate_json(raw)
+    except ValidationError:
+        data = AudioFeaturesResponse.model_validate_json(raw)
+        return CachedAnalysis(data=data, computed_at=0.0, compute_seconds=0.0)
+
+
+async def write_cached(
+    redis_client,
+    key: str,
+    data: AudioFeaturesResponse,
+    compute_seconds: float,
+) -> CachedAnalysis:
+    """Stores a fresh result with the hard TTL enforced by Redis."""
+    entry = CachedAnalysis(
+        data=data, computed_at=time.time(), compute_seconds=compute_seconds
+    )
+    await redis_client.set(
+        key, entry.model_dump_json(), ex=config.CACHE_EXPIRATION_SECONDS
+    )
+    return entry
+
+
+def needs_refresh(
+    entry: CachedAnalysis,
+    now: float | None = None,
+    soft_ttl: float = config.CACHE_SOFT_TTL_SECONDS,
+    beta: float = config.CACHE_EARLY_REFRESH_BETA,
+    rand: Callable[[], float] = random.random,
+) -> bool:
+    """
+    Decides whether a cached entry should be recomputed in the background.
+
+    Uses probabilistic early expiration (XFetch): the closer an entry is to
+    its soft expiry, and the longer it took to compute, the more likely a
+    request is to trigger the refresh. Replicas therefore spread their
+    refreshes out instead of all missing at the same instant.
+    """
+    now = time.time() if now is None else now
+    soft_expiry = entry.computed_at + soft_ttl
+    # 1 - rand() lies in (0, 1], so the log is always defined and <= 0.
+    early_by = -entry.compute_seconds * beta * math.log(1.0 - rand())
+    return now + early_by >= soft_expiry
+
+
+async def try_acquire_refresh(redis_client, key: str) -> bool:
+    """Takes the per-key refresh lock so only one replica recomputes an entry."""
+    acquired = await redis_client.set(
+        f"{REFRESH_LOCK_PREFIX}{key}",
+        "1",
+        nx=True,
+        ex=config.CACHE_REFRESH_LOCK_SECONDS,
+    )
+    if not acquired:
+        logger.debug("Refresh for {} already in progress elsewhere.", key)
+    return bool(acquired)
+
+
+async def release_refresh(redis_client, key: str) -> None:
+    await redis_client.delete(f"{REFRESH_LOCK_PREFIX}{key}")
@@ -0,0 +1,426 @@
+import asyncio
+import json
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+import soxr
+from fastapi import WebSocket, WebSocketDisconnect, status
+from loguru import logger
+from starlette.websockets import WebSocketState
+
+from audio_api import config
+from audio_api.audio_processor import MODEL_TARGET_SR
+from audio_api.ml_classifier import AudioClassificationModel
+from audio_api.profiling import run_in_thread
+
+PCM_ENCODINGS = {"pcm_s16le": np.int16, "pcm_f32le": np.float32}
+ENCODINGS = set(PCM_ENCODINGS) | {"encoded"}
+
+MIN_HOP_SECONDS = 0.25
+
+# Shorter windows are too short for the model's spectrogram (25 ms frames);
+# they only occur when a stream ends almost immediately and are dropped.
+MIN_WINDOW_SECONDS = 0.1
+
+# Windows awaiting inference per connection before the reader stops taking
+# input, so a client sending faster than real time is slowed down.
+MAX_PENDING_WINDOWS = 16
+
+
+class RingBuffer:
+    """Fixed-size circular buffer holding the most recent mono samples."""
+
+    def __init__(self, capacity: int):
+        self._data = np.zeros(capacity, dtype=np.float32)
+        self.total = 0
+
+    def write(self, samples: np.ndarray):
+        capacity = self._data.size
+        received = samples.size
+        samples = samples[-capacity:]
+        # Position the (possibly truncated) tail so it ends where the full
+        # input would have ended.
+        start = (self.total + received - samples.size) % capacity
+        first = min(samples.size, capacity - start)
+        self._data[start : start + first] = samples[:first]
+        self._data[: samples.size - first] = samples[first:]
+        self.total += received
+
+    def latest(self, n: int) -> np.ndarray:
+        """A copy of the last `n` samples, oldest first."""
+        end = self.total % self._data.size
+        if n <= end:
+            return self._data[end - n : end].copy()
+        return np.concatenate((self._data[end - n :], self._data[:end]))
+
+
+class PCMDecoder:
+    """
+    Converts raw interleaved PCM chunks to 16 kHz mono float32, resampling
+    incrementally so chunk boundaries leave no artifacts.
+    """
+
+    def __init__(self, sample_rate: int, channels: int, encoding: str):
+        self.channels = channels
+        self.dtype = np.dtype(PCM_ENCODINGS[encoding])
+        self._frame_bytes = self.dtype.itemsize * channels
+        self._remainder = b""
+        self._resampler = (
+            soxr.ResampleStream(sample_rate, MODEL_TARGET_SR, 1, dtype="float32")
+            if sample_rate != MODEL_TARGET_SR
+            else None
+        )
+
+    def decode(self, data: bytes) -> np.ndarray:
+        data = self._remainder + data
+        usable = len(data) - len(data) % self._frame_bytes
+        self._remainder = data[usable:]
+
+        frames = np.frombuffer(data[:usable], dtype=self.dtype)
+        if self.dtype == np.int16:
+            frames = frames.astype(np.float32) / 32768.0
+        mono = frames.reshape(-1, self.channels).mean(axis=1, dtype=np.float32)
+
+        if self._resampler is None:
+            return mono
+        return self._resampler.resample_chunk(mono)
+
+    def flush(self) -> np.ndarray:
+        if self._resampler is None:
+            return np.zeros(0, dtype=np.float32)
+        return self._resampler.resample_chunk(
+            np.zeros(0, dtype=np.float32), last=True
+        )
+
+
+class FFmpegDecoder:
+    """
+    Decodes a compressed stream (MP3, Ogg, ADTS AAC, FLAC, ...) by piping it
+    through an ffmpeg subprocess that emits 16 kHz mono float32.
+    """
+
+    READ_SIZE = 16384
+
+    def __init__(self):
+        self._process: asyncio.subprocess.Process | None = None
+        self._remainder = b""
+
+    async def start(self):
+        self._process = await asyncio.create_subprocess_exec(
+            "ffmpeg",
+            "-hide_banner",
+            "-loglevel", "error",
+            "-i", "pipe:0",
+            "-f", "f32le",
+            "-ac", "1",
+            "-ar", str(MODEL_TARGET_SR),
+            "pipe:1",
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+        )
+
+    async def write(self, data: bytes):
+        try:
+            self._process.stdin.write(data)
+            await self._process.stdin.drain()
+        except (BrokenPipeError, ConnectionResetError) as e:
+            # ffmpeg exits as soon as it cannot make sense of its input.
+            raise ValueError(f"ffmpeg stopped reading the stream: {e!r}")
+
+    async def close_input(self):
+        self._process.stdin.close()
+
+    async def read(self) -> np.ndarray | None:
+        """The next decoded samples, or None once ffmpeg has finished."""
+        data = await self._process.stdout.read(self.READ_SIZE)
+        if not data:
+            if await self._process.wait() != 0:
+                raise ValueError(
+                    f"ffmpeg exited with status {self._process.returncode}"
+                )
+            return None
+        data = self._remainder + data
+        usable = len(data) - len(data) % 4
+        self._remainder = data[usable:]
+        return np.frombuffer(data[:usable], dtype=np.float32)
+
+    def kill(self):
+        if self._process is not None and self._process.returncode is None:
+            self._process.kill()
+
+
+class InferenceBatcher:
+    """
+    Collects windows submitted by every open stream and classifies them in
+    batches of up to `max_batch`, waiting at most `max_wait` seconds for a
+    batch to fill. One batch runs at a time, leaving torch's intra-op
+    threads to use the cores.
+    """
+
+    def __init__(
+        self,
+        infer: Callable[[List[np.ndarray]], List[Dict[str, float]]],
+        max_batch: int = config.STREAM_MAX_BATCH,
+        max_wait: float = config.STREAM_BATCH_WAIT_MS / 1000,
+    ):
+        self._infer = infer
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._task: asyncio.Task | None = None
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def submit(self, y: np.ndarray) -> Dict[str, float]:
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((y, future))
+        return await future
+
+    async def _next_batch(self) -> List[Tuple[np.ndarray, asyncio.Future]]:
+        batch = [await self._queue.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.max_wait
+        while len(batch) < self.max_batch:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        while True:
+            batch = await self._next_batch()
+            batch = [(y, future) for y, future in batch if not future.cancelled()]
+            if not batch:
+                continue
+            try:
+                results = await run_in_thread(self._infer, [y for y, _ in batch])
+            except Exception as e:
+                if len(batch) == 1:
+                    logger.error(f"Streaming inference failed: {e!r}")
+                    _settle(batch[0][1], exception=e)
+                    continue
+                # Retry one by one so a bad window only fails its own stream.
+                logger.warning(f"Batched inference failed, retrying singly: {e!r}")
+                for y, future in batch:
+                    try:
+                        (probabilities,) = await run_in_thread(self._infer, [y])
+                    except Exception as window_error:
+                        logger.error(f"Streaming inference failed: {window_error!r}")
+                        _settle(future, exception=window_error)
+                    else:
+                        _settle(future, result=probabilities)
+                continue
+            for (_, future), probabilities in zip(batch, results):
+                _settle(future, result=probabilities)
+
+
+def _settle(future: asyncio.Future, result=None, exception=None):
+    """Resolves a future unless its stream has already given up on it."""
+    if future.done():
+        return
+    if exception is not None:
+        future.set_exception(exception)
+    else:
+        future.set_result(result)
+
+
+def model_probabilities(ys: List[np.ndarray]) -> List[Dict[str, float]]:
+    """Batched inference with the shared AudioClassificationModel."""
+    return AudioClassificationModel().class_probabilities(ys, MODEL_TARGET_SR)
+
+
+class StreamSession:
+    """
+    Per-connection state: a ring buffer of 16 kHz samples and the schedule of
+    rolling windows. Every `hop` seconds of received audio, the last `window`
+    seconds are submitted for classification; labels are sent back in order.
+    """
+
+    def __init__(self, batcher: InferenceBatcher, window: float, hop: float):
+        self.batcher = batcher
+        self.window_samples = int(window * MODEL_TARGET_SR)
+        self.hop_samples = int(hop * MODEL_TARGET_SR)
+        self.min_window_samples = int(MIN_WINDOW_SECONDS * MODEL_TARGET_SR)
+        self.ring = RingBuffer(self.window_samples)
+        self._next_emit = self.hop_samples
+        self._results: asyncio.Queue = asyncio.Queue(MAX_PENDING_WINDOWS)
+
+    def _window(self) -> Tuple[float, float, np.ndarray]:
+        n = min(self.ring.total, self.window_samples)
+        end = self.ring.total
+        return (end - n) / MODEL_TARGET_SR, end / MODEL_TARGET_SR, self.ring.latest(n)
+
+    def push(self, samples: np.ndarray) -> List[Tuple[float, float, np.ndarray]]:
+        """Buffers samples and returns the windows whose hop boundary passed."""
+        windows = []
+        while samples.size:
+            room = self._next_emit - self.ring.total
+            self.ring.write(samples[:room])
+            samples = samples[room:]
+            if self.ring.total == self._next_emit:
+                windows.append(self._window())
+                self._next_emit += self.hop_samples
+        return windows
+
+    def finish(self) -> List[Tuple[float, float, np.ndarray]]:
+        """The final window covering audio received since the last hop."""
+        if self.ring.total > self._next_emit - self.hop_samples:
+            return [self._window()]
+        return []
+
+    async def enqueue(self, windows: List[Tuple[float, float, np.ndarray]]):
+        for start, end, y in windows:
+            if y.size < self.min_window_samples:
+                continue
+            task = asyncio.create_task(self.batcher.submit(y))
+            await self._results.put((start, end, task))
+
+    async def send_results(self, websocket: WebSocket):
+        try:
+            await self._send_results(websocket)
+        except Exception as e:
+            logger.error(f"Closing stream after a failed window: {e!r}")
+            # Unblocks the reader, which then sees the disconnect.
+            await _close(websocket, code=status.WS_1011_INTERNAL_ERROR)
+
+    async def _send_results(self, websocket: WebSocket):
+        while (item := await self._results.get()) is not None:
+            start, end, task = item
+            probabilities = await task
+            await websocket.send_json(
+                {
+                    "start": round(start, 3),
+                    "end": round(end, 3),
+                    "classification": max(probabilities, key=probabilities.get),
+                    "probabilities": {
+                        label: round(p, 4) for label, p in probabilities.items()
+                    },
+                }
+            )
+
+    async def close_results(self):
+        await self._results.put(None)
+
+    def cancel_pending(self):
+        while not self._results.empty():
+            item = self._results.get_nowait()
+            if item is not None:
+                item[2].cancel()
+
+
+async def _close(websocket: WebSocket, code: int = 1000, reason: str | None = None):
+    """Closes the socket unless it already has been, e.g. after a failed window."""
+    if websocket.application_state != WebSocketState.DISCONNECTED:
+        await websocket.close(code=code, reason=reason)
+
+
+async def _receive_audio(websocket: WebSocket, on_chunk):
+    """
+    Feeds binary frames to `on_chunk` until the client sends an `end` event
+    (`{"event": "end"}`). Raises WebSocketDisconnect if the client goes away,
+    or after closing the socket when a text frame is not a JSON object.
+    """
+    while True:
+        message = await websocket.receive()
+        if message["type"] == "websocket.disconnect":
+            raise WebSocketDisconnect(message.get("code", 1000))
+        if message.get("bytes"):
+            await on_chunk(message["bytes"])
+        elif message.get("text"):
+            try:
+                event = json.loads(message["text"])
+            except json.JSONDecodeError:
+                event = None
+            if not isinstance(event, dict):
+                await websocket.close(
+                    code=status.WS_1003_UNSUPPORTED_DATA,
+                    reason="Text frames must be JSON objects.",
+                )
+                raise WebSocketDisconnect(status.WS_1003_UNSUPPORTED_DATA)
+            if event.get("event") == "end":
+                return
+
+
+async def stream_classification(
+    websocket: WebSocket,
+    batcher: InferenceBatcher,
+    sample_rate: int,
+    channels: int,
+    encoding: str,
+    window: float,
+    hop: float,
+):
+    """
+    Runs one accepted WebSocket connection: decodes incoming audio, keeps the
+    rolling window, and pushes a label for every hop until the client ends
+    the stream or disconnects.
+    """
+    session = StreamSession(batcher, window, hop)
+    sender = asyncio.create_task(session.send_results(websocket))
+    ffmpeg = pump = None
+    try:
+        if encoding == "encoded":
+            ffmpeg = FFmpegDecoder()
+            try:
+                await ffmpeg.start()
+            except FileNotFoundError:
+                logger.error("ffmpeg is not installed; encoded stream rejected.")
+                await websocket.close(
+                    code=status.WS_1011_INTERNAL_ERROR,
+                    reason="Encoded streams are not supported by this server.",
+                )
+                return
+
+            async def _pump_decoded():
+                while (samples := await ffmpeg.read()) is not None:
+                    await session.enqueue(session.push(samples))
+
+            pump = asyncio.create_task(_pump_decoded())
+            await _receive_audio(websocket, ffmpeg.write)
+            await ffmpeg.close_input()
+            await pump
+        else:
+            decoder = PCMDecoder(sample_rate, channels, encoding)
+
+            async def _on_chunk(data: bytes):
+                await session.enqueue(session.push(decoder.decode(data)))
+
+            await _receive_audio(websocket, _on_chunk)
+            await session.enqueue(session.push(decoder.flush()))
+
+        await session.enqueue(session.finish())
+        await session.close_results()
+        await sender
+        await _close(websocket)
+    except WebSocketDisconnect:
+        logger.info("Stream client disconnected.")
+    except ValueError as e:
+        logger.warning(f"Could not decode the audio stream: {e}")
+        await _close(
+            websocket,
+            code=status.WS_1003_UNSUPPORTED_DATA,
+            reason="Could not decode the audio stream.",
+        )
+    finally:
+        if ffmpeg is not None:
+            ffmpeg.kill()
+        if pump is not None:
+            pump.cancel()
+        sender.cancel()
+        session.cancel_pending()
@@ -0,0 +1,109 @@
+import struct
+from pathlib import Path
+
+import pytest
+
+from audio_api import config, pcm_cache
+from audio_api.ml_classifier import AudioClassificationModel, StubClassificationModel
+
+
+@pytest.fixture(autouse=True)
+def disable_pcm_cache(tmp_path, monkeypatch):
+    """
+    Keeps the decoded-audio cache off so tests always exercise decoding and
+    never touch the shared system temp directory. test_pcm_cache.py enables
+    its own cache in `tmp_path`.
+    """
+    monkeypatch.setattr(config, "PCM_CACHE_MAX_BYTES", 0)
+    monkeypatch.setattr(config, "PCM_CACHE_DIR", str(tmp_path / "pcm"))
+    monkeypatch.setattr(pcm_cache, "_cache", None)
+
+
+def create_fake_wav_file(
+    path: Path, duration_s: int, channels: int, sample_rate: int
+):
+    """
+    Creates a minimal, valid WAV file for testing purposes.
+    """
+
+    bits_per_sample = 16
+    byte_rate = sample_rate * channels * bits_per_sample // 8
+    block_align = channels * bits_per_sample // 8
+    num_samples = sample_rate * duration_s
+    data_size = num_samples * channels * bits_per_sample // 8
+    chunk_size = 36 + data_size
+
+    with open(path, "wb") as f:
+        # RIFF header
+        f.write(b"RIFF")
+        f.write(struct.pack("<I", chunk_size))
+        f.write(b"WAVE")
+        # "fmt " sub-chunk
+        f.write(b"fmt ")
+        f.write(struct.pack("<I", 16))
+        f.write(struct.pack("<H", 1))
+        f.write(struct.pack("<H", channels))
+        f.write(struct.pack("<I", sample_rate))
+        f.write(struct.pack("<I", byte_rate))
+        f.write(struct.pack("<H", block_align))
+        f.write(struct.pack("<H", bits_per_sample))
+        # "data" sub-chunk
+        f.write(b"data")
+        f.write(struct.pack("<I", data_size))
+        # Write empty audio data (silence)
+        f.write(b"\0" * data_size)
+
+
+@pytest.fixture
+def make_wav_file(tmp_path):
+    """
+    Returns a factory writing a silent WAV file named `name` in `tmp_path`:
+    `make_wav_file(name, duration_s=1, channels=1, sample_rate=16000)`.
+    """
+
+    def _make(
+        name: str, duration_s: int = 1, channels: int = 1, sample_rate: int = 16000
+    ) -> Path:
+        path = tmp_path / name
+        create_fake_wav_file(path, duration_s, channels, sample_rate)
+        return path
+
+    return _make
+
+
+class FakeRedis:
+    """Just enough of redis.asyncio.Redis for the cache helpers."""
+
+    def __init__(self):
+        self.store = {}
+
+    async def get(self, key):
+        return self.store.get(key)
+
+    async def mget(self, keys):
+        return [self.store.get(key) for key in keys]
+
+    async def set(self, key, value, ex=None, nx=False):
+        if nx and key in self.store:
+            return None
+        self.store[key] = value
+        return True
+
+    async def delete(self, key):
+        self.store.pop(key, None)
+
+    async def close(self):
+        pass
+
+
+@pytest.fixture
+def fake_redis():
+    return FakeRedis()
+
+
+@pytest.fixture
+def stub_model(monkeypatch):
+    """Installs a StubClassificationModel as the shared model."""
+    model = StubClassificationModel()
+    monkeypatch.setattr(AudioClassificationModel, "_instance", model)
+    return model
@@ -0,0 +1,158 @@
+import argparse
+import json
+import types
+from pathlib import Path
+
+import pytest
+import redis.asyncio
+
+from audio_api import batch, result_cache
+
+
+def test_manifest_from_jsonl(tmp_path: Path):
+    manifest = tmp_path / "manifest.jsonl"
+    manifest.write_text(
+        "\n".join(
+            [
+                json.dumps("https://example.com/a.wav"),
+                json.dumps("/data/b.wav"),
+                json.dumps({"id": "c", "url": "https://example.com/c.mp3"}),
+                "",
+            ]
+        )
+    )
+
+    assert list(batch.iter_manifest(manifest)) == [
+        {"id": "https://example.com/a.wav", "url": "https://example.com/a.wav"},
+        {"id": "/data/b.wav", "path": "/data/b.wav"},
+        {"id": "c", "url": "https://example.com/c.mp3"},
+    ]
+
+
+def test_manifest_from_directory(tmp_path: Path):
+    (tmp_path / "nested").mkdir()
+    (tmp_path / "nested" / "b.flac").touch()
+    (tmp_path / "a.wav").touch()
+    (tmp_path / "notes.txt").touch()
+
+    ids = [item["id"] for item in batch.iter_manifest(tmp_path)]
+
+    assert ids == [str(tmp_path / "a.wav"), str(tmp_path / "nested" / "b.flac")]
+
+
+def test_load_completed_skips_failures_and_truncates_partial_line(tmp_path: Path):
+    output = tmp_path / "results.jsonl"
+    output.write_text(
+        json.dumps({"id": "a", "status": "ok"})
+        + "\n"
+        + json.dumps({"id": "b", "status": "error"})
+        + "\n"
+        + '{"id": "c", "sta'
+    )
+
+    assert batch.load_completed(output) == {"a"}
+    assert output.read_text().endswith('"error"}\n')
+    assert batch.load_completed(tmp_path / "missing.jsonl") == set()
+
+
+def test_process_batch_classifies_in_one_pass(
+    tmp_path: Path, stub_model, make_wav_file
+):
+    items = []
+    for name in ("a.wav", "b.wav"):
+        path = make_wav_file(name)
+        items.append({"id": name, "path": str(path)})
+    items.append({"id": "missing", "path": str(tmp_path / "missing.wav")})
+
+    records = batch.process_batch(items)
+
+    assert stub_model.batches == [2]
+    assert [r["status"] for r in records] == ["ok", "ok", "error"]
+    assert records[0] == {
+        "id": "a.wav",
+        "path": str(tmp_path / "a.wav"),
+        "duration": 1.0,
+        "sample_rate": 16000,
+        "channels": 1,
+        "status": "ok",
+        "classification": "silence",
+    }
+    assert "error" in records[2]
+
+
+@pytest.mark.parametrize("option", ["--workers", "--batch-size"])
+def test_worker_and_batch_counts_must_be_positive(option):
+    parser = argparse.ArgumentParser()
+    batch.add_arguments(parser)
+
+    args = parser.parse_args(["in.jsonl", "-o", "out.jsonl", option, "2"])
+    assert vars(args)[option[2:].replace("-", "_")] == 2
+    for value in ("0", "-1", "many"):
+        with pytest.raises(SystemExit):
+            parser.parse_args(["in.jsonl", "-o", "out.jsonl", option, value])
+
+
+@pytest.mark.asyncio
+async def test_populated_cache_keys_match_the_api(monkeypatch, fake_redis):
+    monkeypatch.setattr(redis.asyncio, "from_url", lambda *args, **kwargs: fake_redis)
+    features = {"duration": 1.0, "sample_rate": 16000, "channels": 1}
+    records = [
+        {"id": "a", "url": "https://Example.COM/a b.wav", "status": "ok"},
+        {"id": "b", "url": "https://example.com", "status": "ok"},
+        {"id": "c", "url": "https://example.com/c.wav", "status": "error"},
+    ]
+    for record in records:
+        record.update(features, classification="music")
+
+    await batch._populate_cache(records, 0.5)
+
+    assert set(fake_redis.store) == {
+        result_cache.cache_key_for("https://example.com/a%20b.wav"),
+        result_cache.cache_key_for("https://example.com/"),
+    }
+
+
+def test_run_batch_resumes_after_interruption(
+    tmp_path: Path, monkeypatch, stub_model, make_wav_file
+):
+    (tmp_path / "audio").mkdir()
+    ids = [str(make_wav_file(f"audio/{name}.wav")) for name in "abcde"]
+    output = tmp_path / "results.jsonl"
+    interrupt_after = [1]
+
+    class InlinePool:
+        """Runs batches in this process, optionally dying part-way through."""
+
+        def __init__(self, processes, initializer=None, initargs=()):
+            pass
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc_info):
+            return False
+
+        def imap_unordered(self, func, batches):
+            for index, items in enumerate(batches):
+                if index == interrupt_after[0]:
+                    raise KeyboardInterrupt
+                yield func(items)
+
+    monkeypatch.setattr(
+        batch.multiprocessing,
+        "get_context",
+        lambda method: types.SimpleNamespace(Pool=InlinePool),
+    )
+
+    with pytest.raises(KeyboardInterrupt):
+        batch.run_batch(tmp_path / "audio", output, workers=1, batch_size=2)
+    assert len(output.read_text().splitlines()) == 2
+
+    interrupt_after[0] = None
+    counts = batch.run_batch(tmp_path / "audio", output, workers=1, batch_size=2)
+
+    assert counts == {"ok": 3, "error": 0}
+    assert stub_model.batches == [2, 2, 1]
+    records = [json.loads(line) for line in output.read_text().splitlines()]
+    assert sorted(record["id"] for record in records) == ids
+    assert all(record["status"] == "ok" for record in records)
@@ -0,0 +1,61 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+from loguru import logger
+
+from audio_api.log_config import request_context, trace, tracing_enabled
+from audio_api.main import app
+
+
+@pytest.fixture
+def captured_records():
+    """Collects the records Loguru emits at DEBUG and above."""
+    records = []
+    handler_id = logger.add(
+        lambda message: records.append(message.record), level="DEBUG"
+    )
+    yield records
+    logger.remove(handler_id)
+
+
+def test_trace_is_silent_for_unsampled_requests(captured_records):
+    with request_context(sampled=False):
+        assert not tracing_enabled()
+        trace("Metrics: {:.2f}", 1.0)
+
+    assert captured_records == []
+
+
+def test_trace_is_emitted_for_sampled_requests(captured_records):
+    with request_context("req-1", sampled=True):
+        assert tracing_enabled()
+        trace("Metrics: {:.2f}", 1.0)
+
+    assert not tracing_enabled()
+    assert [r["message"] for r in captured_records] == ["Metrics: 1.00"]
+    assert captured_records[0]["extra"]["request_id"] == "req-1"
+
+
+def test_invalid_request_id_is_replaced():
+    with request_context("bad id\n" * 20) as request_id:
+        assert request_id.isalnum()
+
+
+@pytest.mark.asyncio
+async def test_request_id_propagates_to_worker_threads(captured_records):
+    def _blocking():
+        logger.info("from worker")
+        return tracing_enabled()
+
+    with request_context("req-2", sampled=True):
+        sampled_in_thread = await asyncio.to_thread(_blocking)
+
+    assert sampled_in_thread
+    assert captured_records[0]["extra"]["request_id"] == "req-2"
+
+
+def test_request_id_header_is_echoed():
+    response = TestClient(app).get("/", headers={"X-Request-ID": "abc-123"})
+
+    assert response.headers["X-Request-ID"] == "abc-123"
@@ -3,12 +3,7 @@ import torch
 import numpy as np
 from unittest.mock import MagicMock
 
-from audio_api.ml_classifier import (
-    AudioClassificationModel,
-    classify_audio_with_model,
-)
-
-pytestmark = pytest.mark.asyncio
+from audio_api.ml_classifier import AudioClassificationModel
 
 
 @pytest.fixture
@@ -42,7 +37,7 @@ def mock_huggingface_model(monkeypatch):
     return mock_model, mock_extractor
 
 
-async def test_class_mapping_creation(mock_huggingface_model):
+def test_class_mapping_creation(mock_huggingface_model):
     """
 
     Verify that our custom mapping from specific to general classes is created correctly.
@@ -57,7 +52,7 @@ async def test_class_mapping_creation(mock_huggingface_model):
     assert "Cat" not in mapping
 
 
-async def test_classify_music(mock_huggingface_model):
+def test_classify_music(mock_huggingface_model):
     """
     Test that audio is correctly classified as 'music' when the model's top
     prediction is a music-related subclass.
@@ -70,12 +65,12 @@ async def test_classify_music(mock_huggingface_model):
     )
 
     dummy_audio = np.random.randn(16000)
-    classification = await classify_audio_with_model(dummy_audio, 16000)
+    classification = AudioClassificationModel().classify(dummy_audio, 16000)
 
     assert classification == "music"
 
 
-async def test_classify_noise_from_unmapped_class(mock_huggingface_model):
+def test_classify_noise_from_unmapped_class(mock_huggingface_model):
     """
     Test that if the top prediction is a class we don't map (like 'Cat'),
     the final classification is the one with the highest score among our
@@ -87,6 +82,25 @@ async def test_classify_noise_from_unmapped_class(mock_huggingface_model):
     mock_model.return_value.logits = fake_logits
 
     dummy_audio = np.random.randn(16000)
-    classification = await classify_audio_with_model(dummy_audio, 16000)
+    classification = AudioClassificationModel().classify(dummy_audio, 16000)
 
     assert classification == "noise"
+
+
+def test_classify_batch_returns_one_label_per_clip(mock_huggingface_model):
+    """
+    Test that a batch is classified with a single model call and each row of
+    logits yields its own label.
+    """
+    mock_model, mock_extractor = mock_huggingface_model
+
+    mock_model.return_value.logits = torch.tensor(
+        [[0.1, 5.0, 0.2, 0.3, 0.4], [0.1, 0.2, 0.5, 0.3, 10.0]]
+    )
+
+    clips = [np.random.randn(16000), np.random.randn(8000)]
+    labels = AudioClassificationModel().classify_batch(clips)
+
+    assert labels == ["music", "noise"]
+    assert mock_model.call_count == 1
+    assert mock_extractor.call_args.args[0] == clips
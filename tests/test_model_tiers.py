@@ -0,0 +1,256 @@
+import asyncio
+import importlib
+import time
+
+import numpy as np
+import pytest
+import torch
+from fastapi.testclient import TestClient
+
+from audio_api import model_tiers, result_cache
+from audio_api.ml_classifier import (
+    REQUIRED_CLASSES,
+    AudioClassificationModel,
+    tiny_random_model,
+)
+from audio_api.model_tiers import ModelTier, ModelTierRegistry
+
+# `audio_api.main` is shadowed by the re-exported `main()` function.
+main = importlib.import_module("audio_api.main")
+
+TEST_URL = "https://example.com/test.wav"
+
+
+@pytest.fixture
+def tiny_ast(monkeypatch):
+    """A randomly initialized one-layer AST used in place of the real one."""
+    model = tiny_random_model()
+    monkeypatch.setattr(AudioClassificationModel, "_instance", model)
+    return model
+
+
+def make_registry(heuristic=0.001, small=0.1, full=1.0) -> ModelTierRegistry:
+    return ModelTierRegistry(
+        [
+            ModelTier(
+                "heuristic", lambda y, sr: "noise", heuristic, per_audio_second=True
+            ),
+            ModelTier("small", lambda y, sr: "noise", small),
+            ModelTier("full", lambda y, sr: "noise", full, half_life=100),
+        ]
+    )
+
+
+def test_reduced_input_variant_shares_weights(tiny_ast):
+    variant = tiny_ast.variant(256)
+
+    assert tiny_ast.variant(256) is variant
+    assert variant.feature_extractor.max_length == 256
+    assert tiny_ast.feature_extractor.max_length == 1024
+
+    full_weight = tiny_ast.model.classifier.dense.weight
+    variant_weight = variant.model.classifier.dense.weight
+    assert variant_weight.data_ptr() == full_weight.data_ptr()
+
+    # 12 frequency patches; 25 of the original 101 time patches are kept.
+    embeddings = tiny_ast.model.audio_spectrogram_transformer.embeddings
+    variant_embeddings = variant.model.audio_spectrogram_transformer.embeddings
+    full_positions = embeddings.position_embeddings
+    positions = variant_embeddings.position_embeddings
+    assert positions.shape == (1, 2 + 12 * 25, 32)
+    grid = full_positions[:, 2:].reshape(1, 12, 101, 32)
+    torch.testing.assert_close(
+        positions[:, 2:].reshape(1, 12, 25, 32), grid[:, :, :25]
+    )
+
+    y = np.random.randn(3 * 16000).astype(np.float32)
+    assert variant.classify(y) in REQUIRED_CLASSES
+
+
+def test_select_caps_by_best_tier_and_fits_budget():
+    registry = make_registry()
+
+    assert registry.select().name == "full"
+    assert registry.select(best="small").name == "small"
+    assert registry.select(budget_seconds=0.5).name == "small"
+    assert registry.select(budget_seconds=5.0, best="heuristic").name == "heuristic"
+    # Nothing fits: the cheapest tier answers rather than failing.
+    assert registry.select(budget_seconds=0.001).name == "heuristic"
+
+
+def test_heuristic_cost_scales_with_duration():
+    registry = make_registry()
+    heuristic = registry.get("heuristic")
+
+    heuristic.observe(0.06, duration=60.0)
+
+    assert heuristic.expected_seconds(30.0) == pytest.approx(0.03)
+    assert registry.get("full").expected_seconds(600.0) == 1.0
+
+
+def test_observations_blend_with_prior_and_decay_back():
+    registry = make_registry()
+    full = registry.get("full")
+
+    # A single slow sample moves the estimate only part of the way.
+    now = time.monotonic()
+    full.observe(6.0, duration=10.0, now=now)
+    assert full.expected_seconds(now=now) == pytest.approx(2.0)
+    assert registry.select(budget_seconds=1.5).name == "small"
+
+    # Without further measurements it drifts back to the prior.
+    assert full.expected_seconds(now=now + 100) == pytest.approx(1.5)
+    assert full.expected_seconds(now=now + 1000) == pytest.approx(1.0, abs=0.01)
+
+    for i in range(10):
+        full.observe(0.3, duration=10.0, now=now + 1000 + i)
+    assert full.expected_seconds(now=now + 1010) < 0.5
+
+
+def test_at_least_lists_better_tiers_best_first():
+    registry = make_registry()
+
+    assert [t.name for t in registry.at_least(registry.get("heuristic"))] == [
+        "full",
+        "small",
+        "heuristic",
+    ]
+    assert [t.name for t in registry.at_least(registry.get("full"))] == ["full"]
+
+
+def test_endpoint_reports_tier_and_caches_per_tier(
+    monkeypatch, tiny_ast, fake_redis, make_wav_file
+):
+    monkeypatch.setattr(model_tiers, "_registry", model_tiers.default_registry())
+    redis_client = fake_redis
+    main.app.state.redis = redis_client
+
+    async def fake_download(audio_url):
+        # run_analysis deletes the file once it is classified.
+        return make_wav_file("test.wav")
+
+    monkeypatch.setattr(main, "download_audio_file", fake_download)
+    client = TestClient(main.app)
+
+    def analyze(**hints):
+        response = client.post(
+            "/analyze-audio", json={"audio_url": TEST_URL, **hints}
+        )
+        assert response.status_code == 200
+        return response.json()["data"]
+
+    assert analyze(quality="medium")["model_tier"] == "small"
+    assert result_cache.cache_key_for(TEST_URL, "small") in redis_client.store
+    assert result_cache.cache_key_for(TEST_URL) not in redis_client.store
+
+    assert analyze()["model_tier"] == "full"
+    assert result_cache.cache_key_for(TEST_URL) in redis_client.store
+
+    # A cached answer from a better tier is served to a cheaper request.
+    assert analyze(quality="low")["model_tier"] == "full"
+    assert model_tiers.get_registry().get("heuristic").observations == 0
+    assert model_tiers.get_registry().get("small").observations == 1
+
+
+@pytest.mark.parametrize("tier", ["heuristic", "small", "full"])
+def test_endpoint_classifies_audio_not_sampled_at_16khz(
+    monkeypatch, tiny_ast, fake_redis, make_wav_file, tier
+):
+    monkeypatch.setattr(model_tiers, "_registry", model_tiers.default_registry())
+    main.app.state.redis = fake_redis
+    seen_rates = []
+
+    def record_rate(y, sr):
+        seen_rates.append(sr)
+        return original(y, sr)
+
+    registry_tier = model_tiers.get_registry().get(tier)
+    original = registry_tier.classify
+    monkeypatch.setattr(registry_tier, "classify", record_rate)
+
+    async def fake_download(audio_url):
+        return make_wav_file("cd.wav", 1, 2, 44100)
+
+    monkeypatch.setattr(main, "download_audio_file", fake_download)
+    quality = {"heuristic": "low", "small": "medium", "full": "high"}[tier]
+
+    response = TestClient(main.app).post(
+        "/analyze-audio", json={"audio_url": TEST_URL, "quality": quality}
+    )
+
+    assert response.status_code == 200
+    data = response.json()["data"]
+    assert data["model_tier"] == tier
+    assert data["sample_rate"] == 44100
+    assert seen_rates == [16000]
+
+
+@pytest.fixture
+def analyze_with_budget(monkeypatch, fake_redis, make_wav_file):
+    """
+    Posts a 1-second clip with a latency budget against tiers expected to
+    take 1 ms per audio second, 50 ms and 1 s. Returns the response data
+    and the cache keys looked up before downloading.
+    """
+    monkeypatch.setattr(model_tiers, "_registry", make_registry(small=0.05))
+    main.app.state.redis = fake_redis
+    lookups = []
+    mget = fake_redis.mget
+
+    async def recording_mget(keys):
+        lookups.extend(keys)
+        return await mget(keys)
+
+    monkeypatch.setattr(fake_redis, "mget", recording_mget)
+
+    def analyze(budget_ms: float, download_seconds: float = 0.0):
+        async def slow_download(audio_url):
+            await asyncio.sleep(download_seconds)
+            return make_wav_file("test.wav")
+
+        monkeypatch.setattr(main, "download_audio_file", slow_download)
+        response = TestClient(main.app).post(
+            "/analyze-audio",
+            json={"audio_url": TEST_URL, "latency_budget_ms": budget_ms},
+        )
+        assert response.status_code == 200
+        return response.json()["data"], lookups
+
+    return analyze
+
+
+def test_budget_too_small_for_any_tier_is_answered_by_heuristic(
+    analyze_with_budget, fake_redis
+):
+    data, lookups = analyze_with_budget(0.5)
+
+    assert data["model_tier"] == "heuristic"
+    assert result_cache.cache_key_for(TEST_URL, "heuristic") in fake_redis.store
+    assert len(lookups) == 3
+
+
+def test_budget_between_small_and_full_selects_small(analyze_with_budget):
+    data, lookups = analyze_with_budget(500)
+
+    assert data["model_tier"] == "small"
+    assert lookups == [
+        result_cache.cache_key_for(TEST_URL),
+        result_cache.cache_key_for(TEST_URL, "small"),
+    ]
+
+
+def test_budget_spent_downloading_falls_back_after_decode(
+    analyze_with_budget, fake_redis
+):
+    # Small fits the 100 ms budget up front, but not the time left after an
+    # 80 ms download.
+    data, lookups = analyze_with_budget(100, download_seconds=0.08)
+
+    assert lookups == [
+        result_cache.cache_key_for(TEST_URL),
+        result_cache.cache_key_for(TEST_URL, "small"),
+    ]
+    assert data["model_tier"] == "heuristic"
+    assert list(fake_redis.store) == [
+        result_cache.cache_key_for(TEST_URL, "heuristic")
+    ]
@@ -0,0 +1,76 @@
+import os
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from audio_api import audio_processor
+from audio_api.pcm_cache import PCMCache, file_digest
+
+FEATURES = {"duration": 1.0, "sample_rate": 44100, "channels": 2}
+
+
+def test_put_then_get_returns_memory_mapped_array(tmp_path: Path):
+    cache = PCMCache(tmp_path, max_bytes=10_000_000)
+    y = np.random.randn(16000).astype(np.float32)
+
+    cache.put("abc", FEATURES, y)
+    features, cached_y = cache.get("abc")
+
+    assert features == FEATURES
+    assert isinstance(cached_y, np.memmap)
+    assert cached_y.dtype == np.float32
+    np.testing.assert_array_equal(cached_y, y)
+    assert cache.get("missing") is None
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path: Path):
+    entry = np.zeros(1000, dtype=np.float32)
+    # Room for two entries (plus .npy headers) but not three.
+    cache = PCMCache(tmp_path, max_bytes=int(entry.nbytes * 2.5))
+
+    cache.put("first", FEATURES, entry)
+    cache.put("second", FEATURES, entry)
+    os.utime(tmp_path / "first.npy", (0, 0))
+    os.utime(tmp_path / "second.npy", (1, 1))
+
+    # Reading "first" makes it the most recently used entry.
+    assert cache.get("first") is not None
+    cache.put("third", FEATURES, entry)
+
+    assert cache.get("second") is None
+    assert not (tmp_path / "second.json").exists()
+    assert cache.get("first") is not None
+    assert cache.get("third") is not None
+
+
+def test_entries_larger_than_budget_are_not_stored(tmp_path: Path):
+    cache = PCMCache(tmp_path, max_bytes=100)
+
+    cache.put("big", FEATURES, np.zeros(1000, dtype=np.float32))
+
+    assert cache.get("big") is None
+
+
+@pytest.mark.asyncio
+async def test_extract_reuses_cached_pcm(
+    tmp_path: Path, monkeypatch, make_wav_file
+):
+    cache = PCMCache(tmp_path / "pcm", max_bytes=10_000_000)
+    monkeypatch.setattr(audio_processor, "get_pcm_cache", lambda: cache)
+
+    audio_file = make_wav_file("test.wav", 1, 2, 44100)
+    first_features, first_y, first_sr = await audio_processor.extract_audio_features(
+        audio_file
+    )
+
+    def _fail_load(*args, **kwargs):
+        raise AssertionError("decoded again instead of using the PCM cache")
+
+    monkeypatch.setattr(audio_processor.librosa, "load", _fail_load)
+    features, y, sr = await audio_processor.extract_audio_features(audio_file)
+
+    assert (features, sr) == (first_features, first_sr)
+    assert isinstance(y, np.memmap)
+    np.testing.assert_array_equal(y, first_y)
+    assert cache.get(file_digest(audio_file)) is not None
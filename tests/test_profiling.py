@@ -0,0 +1,83 @@
+import json
+import time
+from pathlib import Path
+
+import pytest
+
+from audio_api import config, profiling
+
+
+def busy_work(seconds: float) -> int:
+    """Keeps a worker thread on-CPU long enough to be sampled."""
+    deadline = time.perf_counter() + seconds
+    total = 0
+    while time.perf_counter() < deadline:
+        total += sum(range(1000))
+    return total
+
+
+@pytest.fixture
+def profile_dir(tmp_path: Path, monkeypatch) -> Path:
+    monkeypatch.setattr(config, "PROFILE_DIR", str(tmp_path))
+    monkeypatch.setattr(config, "PROFILE_SAMPLE_INTERVAL_MS", 1)
+    return tmp_path
+
+
+@pytest.mark.asyncio
+async def test_hooks_are_passthrough_without_profile():
+    with profiling.stage("classify"):
+        result = await profiling.run_in_thread(sum, [1, 2, 3])
+
+    assert result == 6
+
+
+@pytest.mark.asyncio
+async def test_profile_captures_stages_and_worker_threads(profile_dir: Path):
+    async with profiling.profile_request("req-1") as profile:
+        with profiling.stage("classify"):
+            await profiling.run_in_thread(busy_work, 0.1)
+
+    assert [stage["name"] for stage in profile.stages] == ["classify"]
+    assert profile.server_timing().startswith("classify;dur=")
+
+    report = json.loads((profile_dir / "req-1.json").read_text())
+    assert report["stages"][0]["seconds"] >= 0.1
+    assert report["peak_memory_bytes"] is None
+
+    flamegraph = (profile_dir / report["flamegraph"]).read_text()
+    worker_stacks = [
+        line
+        for line in flamegraph.splitlines()
+        if line.startswith("worker:busy_work;")
+    ]
+    assert worker_stacks
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in worker_stacks)
+
+
+@pytest.mark.asyncio
+async def test_profile_tracks_memory(profile_dir: Path):
+    async with profiling.profile_request("req-2", track_memory=True) as profile:
+        with profiling.stage("allocate"):
+            await profiling.run_in_thread(bytearray, 5_000_000)
+
+    assert profile.stages[0]["peak_memory_bytes"] >= 5_000_000
+    assert profile.peak_memory_bytes is not None
+    assert profile.top_allocations
+
+
+def test_profiling_requires_configured_token(monkeypatch):
+    headers = {
+        profiling.PROFILE_HEADER: "secret",
+        profiling.PROFILE_MEMORY_HEADER: "1",
+    }
+
+    monkeypatch.setattr(config, "PROFILING_TOKEN", "")
+    assert profiling.requested_mode(headers, {}) == (False, False)
+
+    monkeypatch.setattr(config, "PROFILING_TOKEN", "secret")
+    assert profiling.requested_mode(headers, {}) == (True, True)
+    assert profiling.requested_mode({}, {"profile": "secret"}) == (True, False)
+    assert profiling.requested_mode({profiling.PROFILE_HEADER: "wrong"}, {}) == (
+        False,
+        False,
+    )
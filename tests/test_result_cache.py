@@ -0,0 +1,155 @@
+import importlib
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from audio_api import result_cache
+from audio_api.models import AudioFeaturesResponse, CachedAnalysis
+
+# `audio_api.main` is shadowed by the re-exported `main()` function.
+main = importlib.import_module("audio_api.main")
+
+TEST_URL = "https://example.com/test.wav"
+
+SAMPLE_DATA = AudioFeaturesResponse(
+    duration=1.0, sample_rate=16000, channels=1, classification="speech"
+)
+
+
+def make_entry(age: float, compute_seconds: float = 2.0) -> CachedAnalysis:
+    return CachedAnalysis(
+        data=SAMPLE_DATA,
+        computed_at=time.time() - age,
+        compute_seconds=compute_seconds,
+    )
+
+
+def test_fresh_entry_is_not_refreshed():
+    entry = make_entry(age=10)
+
+    assert not result_cache.needs_refresh(
+        entry, soft_ttl=3000, beta=1.0, rand=lambda: 0.5
+    )
+
+
+def test_entry_past_soft_ttl_is_refreshed():
+    entry = make_entry(age=3001)
+
+    assert result_cache.needs_refresh(
+        entry, soft_ttl=3000, beta=1.0, rand=lambda: 0.0
+    )
+
+
+def test_early_refresh_depends_on_compute_time_and_draw():
+    """
+    Close to the soft expiry, an unlucky draw triggers an early refresh for a
+    slow-to-compute entry, while a cheap entry waits for the deadline.
+    """
+    slow = make_entry(age=2990, compute_seconds=20.0)
+    cheap = make_entry(age=2990, compute_seconds=0.1)
+
+    assert result_cache.needs_refresh(slow, soft_ttl=3000, rand=lambda: 0.9)
+    assert not result_cache.needs_refresh(cheap, soft_ttl=3000, rand=lambda: 0.9)
+    assert not result_cache.needs_refresh(slow, soft_ttl=3000, rand=lambda: 0.1)
+
+
+def test_default_tier_keeps_original_cache_key():
+    assert result_cache.cache_key_for(TEST_URL) == f"audio_cache:{TEST_URL}"
+    assert result_cache.cache_key_for(TEST_URL, "full") == f"audio_cache:{TEST_URL}"
+    assert (
+        result_cache.cache_key_for(TEST_URL, "small")
+        == f"audio_cache:small:{TEST_URL}"
+    )
+
+
+@pytest.mark.asyncio
+async def test_write_then_read_roundtrip(fake_redis):
+    redis_client = fake_redis
+    key = result_cache.cache_key_for(TEST_URL)
+
+    await result_cache.write_cached(redis_client, key, SAMPLE_DATA, 1.5)
+    entry = await result_cache.read_cached(redis_client, key)
+
+    assert entry.data == SAMPLE_DATA
+    assert entry.compute_seconds == 1.5
+    assert await result_cache.read_cached(redis_client, "missing") is None
+
+
+@pytest.mark.asyncio
+async def test_legacy_entry_is_read_as_stale(fake_redis):
+    redis_client = fake_redis
+    key = result_cache.cache_key_for(TEST_URL)
+    redis_client.store[key] = SAMPLE_DATA.model_dump_json()
+
+    entry = await result_cache.read_cached(redis_client, key)
+
+    assert entry.data == SAMPLE_DATA
+    assert result_cache.needs_refresh(entry)
+
+
+@pytest.mark.asyncio
+async def test_read_first_cached_returns_earliest_present_key(fake_redis):
+    full, small, heuristic = (
+        result_cache.cache_key_for(TEST_URL, tier)
+        for tier in ("full", "small", "heuristic")
+    )
+    await result_cache.write_cached(fake_redis, small, SAMPLE_DATA, 1.0)
+
+    key, entry = await result_cache.read_first_cached(
+        fake_redis, [full, small, heuristic]
+    )
+    assert (key, entry.data) == (small, SAMPLE_DATA)
+
+    await result_cache.write_cached(fake_redis, full, SAMPLE_DATA, 1.0)
+    key, _ = await result_cache.read_first_cached(fake_redis, [full, small])
+    assert key == full
+
+    assert await result_cache.read_first_cached(fake_redis, [heuristic]) == (
+        None,
+        None,
+    )
+
+
+@pytest.mark.asyncio
+async def test_refresh_lock_is_exclusive(fake_redis):
+    redis_client = fake_redis
+
+    assert await result_cache.try_acquire_refresh(redis_client, "k")
+    assert not await result_cache.try_acquire_refresh(redis_client, "k")
+
+    await result_cache.release_refresh(redis_client, "k")
+    assert await result_cache.try_acquire_refresh(redis_client, "k")
+
+
+def test_stale_entry_is_served_and_refreshed_in_background(
+    monkeypatch, fake_redis
+):
+    redis_client = fake_redis
+    key = result_cache.cache_key_for(TEST_URL)
+    redis_client.store[key] = make_entry(age=10_000).model_dump_json()
+
+    refreshed = AudioFeaturesResponse(
+        duration=1.0, sample_rate=16000, channels=1, classification="music"
+    )
+
+    async def fake_run_analysis(audio_url, model_tier):
+        return refreshed, 0.5
+
+    monkeypatch.setattr(main, "run_analysis", fake_run_analysis)
+    main.app.state.redis = redis_client
+
+    response = TestClient(main.app).post(
+        "/analyze-audio", json={"audio_url": TEST_URL}
+    )
+
+    # The stale value is returned immediately...
+    assert response.status_code == 200
+    assert response.json()["data"]["classification"] == "speech"
+
+    # ...and the background task has replaced it with a fresh one.
+    entry = CachedAnalysis.model_validate_json(redis_client.store[key])
+    assert entry.data.classification == "music"
+    assert not any(
+        k.startswith(result_cache.REFRESH_LOCK_PREFIX) for k in redis_client.store
+    )
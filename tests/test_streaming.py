@@ -0,0 +1,242 @@
+import asyncio
+import importlib
+import shutil
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+from audio_api import config, streaming
+
+# `audio_api.main` is shadowed by the re-exported `main()` function.
+main = importlib.import_module("audio_api.main")
+
+SR = 16000
+
+
+def test_ring_buffer_keeps_latest_samples_across_wraparound():
+    ring = streaming.RingBuffer(5)
+
+    ring.write(np.arange(3, dtype=np.float32))
+    ring.write(np.arange(3, 7, dtype=np.float32))
+
+    assert ring.total == 7
+    np.testing.assert_array_equal(ring.latest(5), [2, 3, 4, 5, 6])
+    np.testing.assert_array_equal(ring.latest(2), [5, 6])
+
+    ring.write(np.arange(10, 22, dtype=np.float32))
+    np.testing.assert_array_equal(ring.latest(5), [17, 18, 19, 20, 21])
+
+
+def test_pcm_decoder_downmixes_and_resamples_across_chunks():
+    decoder = streaming.PCMDecoder(32000, 2, "pcm_s16le")
+    stereo = np.full((32000, 2), 16384, dtype=np.int16).tobytes()
+
+    # Split mid-frame to exercise the carried-over remainder.
+    out = [decoder.decode(stereo[:1001]), decoder.decode(stereo[1001:])]
+    out.append(decoder.flush())
+    y = np.concatenate(out)
+
+    assert y.dtype == np.float32
+    assert abs(y.size - SR) <= 1
+    np.testing.assert_allclose(y[100:-100], 0.5, atol=1e-3)
+
+
+def test_session_emits_one_window_per_hop():
+    session = streaming.StreamSession(batcher=None, window=2.0, hop=0.5)
+
+    windows = session.push(np.ones(int(1.25 * SR), dtype=np.float32))
+    windows += session.push(np.ones(int(1.75 * SR), dtype=np.float32))
+
+    assert [(start, end) for start, end, _ in windows] == [
+        (0.0, 0.5),
+        (0.0, 1.0),
+        (0.0, 1.5),
+        (0.0, 2.0),
+        (0.5, 2.5),
+        (1.0, 3.0),
+    ]
+    assert windows[-1][2].size == 2 * SR
+    assert session.finish() == []
+
+    session.push(np.ones(SR // 10, dtype=np.float32))
+    (start, end, _), = session.finish()
+    assert (start, end) == (1.1, 3.1)
+
+
+@pytest.mark.asyncio
+async def test_batcher_groups_concurrent_windows():
+    batch_sizes = []
+
+    def infer(ys):
+        batch_sizes.append(len(ys))
+        return [{"music": float(y[0])} for y in ys]
+
+    batcher = streaming.InferenceBatcher(infer, max_batch=8, max_wait=0.05)
+    batcher.start()
+    try:
+        results = await asyncio.gather(
+            *(batcher.submit(np.full(10, i, dtype=np.float32)) for i in range(5))
+        )
+    finally:
+        await batcher.stop()
+
+    assert batch_sizes == [5]
+    assert [r["music"] for r in results] == [0, 1, 2, 3, 4]
+
+
+@pytest.mark.asyncio
+async def test_batcher_fails_only_the_window_that_breaks_inference():
+    calls = []
+
+    def infer(ys):
+        calls.append(len(ys))
+        if any(y.size < 5 for y in ys):
+            raise ValueError("negative dimensions are not allowed")
+        return [{"music": float(y[0])} for y in ys]
+
+    batcher = streaming.InferenceBatcher(infer, max_batch=8, max_wait=0.05)
+    batcher.start()
+    try:
+        results = await asyncio.gather(
+            batcher.submit(np.full(10, 1, dtype=np.float32)),
+            batcher.submit(np.zeros(2, dtype=np.float32)),
+            batcher.submit(np.full(10, 3, dtype=np.float32)),
+            return_exceptions=True,
+        )
+    finally:
+        await batcher.stop()
+
+    assert calls == [3, 1, 1, 1]
+    assert results[0] == {"music": 1.0}
+    assert isinstance(results[1], ValueError)
+    assert results[2] == {"music": 3.0}
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch, stub_model):
+    monkeypatch.setattr(config, "LOG_DIR", str(tmp_path))
+    with TestClient(main.app) as test_client:
+        yield test_client
+
+
+def test_websocket_stream_returns_rolling_labels(client):
+    pcm = np.zeros(int(2.5 * 8000), dtype=np.int16).tobytes()
+
+    with client.websocket_connect(
+        "/stream?sample_rate=8000&encoding=pcm_s16le&hop=1&window=2"
+    ) as websocket:
+        for start in range(0, len(pcm), 3200):
+            websocket.send_bytes(pcm[start : start + 3200])
+        websocket.send_json({"event": "end"})
+
+        messages = [websocket.receive_json() for _ in range(3)]
+
+    assert [(m["start"], m["end"]) for m in messages] == [
+        (0.0, 1.0),
+        (0.0, 2.0),
+        (0.5, 2.5),
+    ]
+    assert all(m["classification"] == "silence" for m in messages)
+
+
+def test_websocket_rejects_invalid_parameters(client):
+    with pytest.raises(WebSocketDisconnect) as excinfo:
+        with client.websocket_connect("/stream?encoding=opus-raw") as websocket:
+            websocket.receive_json()
+
+    assert excinfo.value.code == 1008
+
+
+def test_websocket_drops_window_too_short_to_classify(client):
+    with client.websocket_connect("/stream?encoding=pcm_s16le") as websocket:
+        websocket.send_bytes(np.zeros(100, dtype=np.int16).tobytes())
+        websocket.send_json({"event": "end"})
+
+        with pytest.raises(WebSocketDisconnect) as excinfo:
+            websocket.receive_json()
+
+    assert excinfo.value.code == 1000
+
+
+@pytest.mark.parametrize("text", ["hello", "1", "[]"])
+def test_websocket_closes_on_text_frame_that_is_not_an_object(client, text):
+    with client.websocket_connect("/stream") as websocket:
+        websocket.send_text(text)
+
+        with pytest.raises(WebSocketDisconnect) as excinfo:
+            websocket.receive_json()
+
+    assert excinfo.value.code == 1003
+
+
+def test_websocket_closes_with_error_when_final_window_fails(
+    client, stub_model, monkeypatch
+):
+    def fail(ys, sr=SR):
+        raise RuntimeError("inference failed")
+
+    monkeypatch.setattr(stub_model, "class_probabilities", fail)
+
+    # Shorter than a hop: the only window is classified after "end".
+    with client.websocket_connect("/stream?encoding=pcm_s16le") as websocket:
+        websocket.send_bytes(np.zeros(SR // 4, dtype=np.int16).tobytes())
+        websocket.send_json({"event": "end"})
+
+        with pytest.raises(WebSocketDisconnect) as excinfo:
+            websocket.receive_json()
+
+    assert excinfo.value.code == 1011
+
+
+def test_websocket_closes_when_ffmpeg_is_missing(client, tmp_path, monkeypatch):
+    monkeypatch.setenv("PATH", str(tmp_path))
+
+    with client.websocket_connect("/stream?encoding=encoded") as websocket:
+        with pytest.raises(WebSocketDisconnect) as excinfo:
+            websocket.receive_json()
+
+    assert excinfo.value.code == 1011
+
+
+def test_websocket_closes_when_ffmpeg_rejects_the_stream(
+    client, tmp_path, monkeypatch
+):
+    # Stands in for ffmpeg giving up on input it cannot decode.
+    fake_ffmpeg = tmp_path / "bin" / "ffmpeg"
+    fake_ffmpeg.parent.mkdir()
+    fake_ffmpeg.write_text("#!/bin/sh\nexit 1\n")
+    fake_ffmpeg.chmod(0o755)
+    monkeypatch.setenv("PATH", str(fake_ffmpeg.parent))
+
+    with client.websocket_connect("/stream?encoding=encoded") as websocket:
+        for _ in range(8):
+            websocket.send_bytes(b"not audio" * 1000)
+        websocket.send_json({"event": "end"})
+
+        with pytest.raises(WebSocketDisconnect) as excinfo:
+            websocket.receive_json()
+
+    assert excinfo.value.code == 1003
+
+
+@pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg is not installed")
+def test_websocket_decodes_encoded_stream(client, make_wav_file):
+    data = make_wav_file("stream.wav", 3, 2, 44100).read_bytes()
+
+    with client.websocket_connect(
+        "/stream?encoding=encoded&hop=1&window=2"
+    ) as websocket:
+        for start in range(0, len(data), 8192):
+            websocket.send_bytes(data[start : start + 8192])
+        websocket.send_json({"event": "end"})
+
+        messages = [websocket.receive_json() for _ in range(3)]
+
+    assert [(m["start"], m["end"]) for m in messages] == [
+        (0.0, 1.0),
+        (0.0, 2.0),
+        (1.0, 3.0),
+    ]
+    assert all(m["classification"] == "silence" for m in messages)